@@ -10,20 +10,31 @@ separate model for image generation.
 To run the application:
 streamlit run app.py
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
+from PIL import Image
 
 from src.core.content_chains import (
+    SemanticCachedChain, ainvoke_all, create_semantic_cache_store,
     create_blog_chain, create_image_prompt_chain,
     create_instagram_adaptor_chain, create_linkedin_adaptor_chain,
     create_twitter_adaptor_chain, generate_science_post_chain
 )
 from src.models.image_generator import (
-    generate_image_from_huggingface,
+    generate_image_bytes_from_huggingface,
     generate_image_from_replicate,
+    create_placeholder_image,
     search_image_from_unsplash,
-    search_image_from_pexels
+    search_image_from_pexels,
+    to_webp_bytes,
+    warm_up_clients
 )
+from src.models.llm_factory import warm_up_llms
 from src.core.rag_engine import ScienceRAG
+from config.prompts import SCIENCE_ANSWER_TOKENS, estimate_tokens, remaining_budget, truncate_to_budget
+from config.settings import LLM_CONTEXT_WINDOW, SEMANTIC_CACHE_ENABLED
 
 st.set_page_config(layout="wide")
 
@@ -31,6 +42,22 @@ st.set_page_config(layout="wide")
 def get_rag_engine():
     return ScienceRAG()
 
+@st.cache_resource
+def get_semantic_cache_store():
+    # One Chroma client for every cached chain, reusing the RAG embedding model
+    return create_semantic_cache_store(get_rag_engine().embeddings)
+
+@st.cache_resource
+def get_background_executor():
+    # Shared across reruns, for I/O that can overlap with LLM generation
+    return ThreadPoolExecutor(max_workers=2)
+
+@st.cache_resource
+def warm_up_providers():
+    # Runs once per server process, in the background so the first render is not delayed
+    executor = get_background_executor()
+    return executor.submit(warm_up_llms), executor.submit(warm_up_clients)
+
 @st.cache_data
 def get_cached_papers(_rag_engine):
     """
@@ -220,24 +247,56 @@ def generate_content(
         st.warning("Por favor, introduce el Tema y la Audiencia.")
         return
 
+    brand_bio = brand_bio.strip() if brand_bio.strip() else "No proporcionado."
+
+    # Session constants are bound into the prompts once, so every chain
+    # shares the same prompt prefix and only receives per-request inputs.
+    session_inputs = {
+        "brand_bio": brand_bio,
+        "target_language": target_language,
+    }
+
     try:
         st.info(f"Inicializando motor de contenido con: **{llm_selection}**...")
-        blog_chain = create_blog_chain(llm_selection)
+        blog_chain = create_blog_chain(llm_selection, **session_inputs)
         image_prompt_chain = create_image_prompt_chain(llm_selection)
-        twitter_adaptor_chain = create_twitter_adaptor_chain(llm_selection)
-        instagram_adaptor_chain = create_instagram_adaptor_chain(llm_selection)
-        linkedin_adaptor_chain = create_linkedin_adaptor_chain(llm_selection)
-        science_post_chain = generate_science_post_chain(llm_selection)
+        twitter_adaptor_chain = create_twitter_adaptor_chain(llm_selection, **session_inputs)
+        instagram_adaptor_chain = create_instagram_adaptor_chain(llm_selection, **session_inputs)
+        linkedin_adaptor_chain = create_linkedin_adaptor_chain(llm_selection, **session_inputs)
+        science_post_chain = generate_science_post_chain(llm_selection, **session_inputs)
+
+        if SEMANTIC_CACHE_ENABLED:
+            cache_store = get_semantic_cache_store()
+            blog_chain = SemanticCachedChain(blog_chain, cache_store)
+            # The image prompt only depends on the blog, which is matched
+            # exactly: a repeated blog gets the same prompt back, and that
+            # prompt then hits the on-disk image cache instead of rendering again
+            image_prompt_chain = SemanticCachedChain(image_prompt_chain, cache_store)
+            twitter_adaptor_chain = SemanticCachedChain(twitter_adaptor_chain, cache_store)
+            instagram_adaptor_chain = SemanticCachedChain(instagram_adaptor_chain, cache_store)
+            linkedin_adaptor_chain = SemanticCachedChain(linkedin_adaptor_chain, cache_store)
+            science_post_chain = SemanticCachedChain(science_post_chain, cache_store)
         
     except Exception as e:
         st.error(f"No se pudo inicializar un componente. Error: {e}")
         st.stop()
 
-    brand_bio = brand_bio.strip() if brand_bio.strip() else "No proporcionado."
+    use_stock_photos = bool(image_provider) and (
+        "Unsplash" in image_provider or "Pexels" in image_provider
+    )
+
+    # A stock photo only depends on the topic, so its search and download run
+    # in the background while the blog and the adaptations are generated.
+    stock_photo_future = None
+    if generate_image and use_stock_photos:
+        search_stock_photo = (
+            search_image_from_unsplash if "Unsplash" in image_provider else search_image_from_pexels
+        )
+        stock_photo_future = get_background_executor().submit(search_stock_photo, topic)
 
     with st.spinner("Generando Artículo de Blog..."):
         st.info(f"Recuperando información de la base de datos científica...")
-        rag = ScienceRAG()
+        rag = get_rag_engine()
         documents = rag.get_context(topic)
         
         if not documents:
@@ -246,60 +305,58 @@ def generate_content(
             inputs = {
                 "topic": topic,
                 "audience": audience,
-                "target_language": target_language,
-                "brand_bio": brand_bio,
             }
-            blog_content = blog_chain.invoke(inputs)
             st.markdown("### 📝 Artículo de Blog")
-            st.markdown(blog_content)
+            # Stream tokens to the page as they arrive instead of waiting
+            # for the whole article to be generated.
+            blog_content = st.write_stream(blog_chain.stream(inputs))
         else:
-            blog_content = science_post_chain.invoke(
+            # The papers get whatever the prompt scaffold, the session inputs
+            # and the answer leave free in the model's context window
+            session_tokens = estimate_tokens(topic + brand_bio + target_language)
+            documents = truncate_to_budget(documents, remaining_budget(
+                "science", LLM_CONTEXT_WINDOW, reserved=SCIENCE_ANSWER_TOKENS + session_tokens
+            ))
+            st.markdown("### 📝 Artículo de Blog Científico")
+            blog_content = st.write_stream(science_post_chain.stream(
                 {
                     "documents": documents, 
-                    "topic": topic, 
-                    "target_language": target_language,
-                    "brand_bio": brand_bio                
+                    "topic": topic,
                 }
-            )
-            st.markdown("### 📝 Artículo de Blog Científico")
-            st.markdown(blog_content)
+            ))
 
     st.divider()
 
+    # The adaptations and the image prompt only depend on the blog, so they
+    # are requested concurrently instead of one after the other.
+    parallel_chains = {}
+    if generate_twitter:
+        parallel_chains["twitter"] = twitter_adaptor_chain
+    if generate_instagram:
+        parallel_chains["instagram"] = instagram_adaptor_chain
+    if generate_linkedin:
+        parallel_chains["linkedin"] = linkedin_adaptor_chain
+    if generate_image and image_provider and not use_stock_photos:
+        parallel_chains["image_prompt"] = image_prompt_chain
+
+    results = {}
+    if parallel_chains:
+        with st.spinner("Adaptando contenido..."):
+            results = asyncio.run(ainvoke_all(parallel_chains, {"blog_content": blog_content}))
+
     if generate_twitter:
         st.markdown("### 🐦 Adaptación para Twitter/X")
-        with st.spinner("Adaptando contenido a formato Twitter/X..."):
-            twitter_inputs = {
-                "blog_content": blog_content,
-                "target_language": target_language,
-                "brand_bio": brand_bio,
-            }
-            twitter_content = twitter_adaptor_chain.invoke(twitter_inputs)
-            st.markdown(twitter_content)
+        st.markdown(results["twitter"])
         st.divider()
 
     if generate_instagram:
         st.markdown("### 📸 Adaptación para Instagram")
-        with st.spinner("Adaptando contenido a Instagram (Caption)..."):
-            insta_inputs = {
-                "blog_content": blog_content,
-                "target_language": target_language,
-                "brand_bio": brand_bio,
-            }
-            instagram_content = instagram_adaptor_chain.invoke(insta_inputs)
-            st.markdown(instagram_content)
+        st.markdown(results["instagram"])
         st.divider()
 
     if generate_linkedin:
         st.markdown("### 💼 Adaptación para LinkedIn")
-        with st.spinner("Adaptando contenido a LinkedIn..."):
-            linkedin_inputs = {
-                "blog_content": blog_content,
-                "target_language": target_language,
-                "brand_bio": brand_bio,
-            }
-            linkedin_content = linkedin_adaptor_chain.invoke(linkedin_inputs)
-            st.markdown(linkedin_content)
+        st.markdown(results["linkedin"])
         st.divider()
 
     if generate_image and image_provider:
@@ -307,23 +364,24 @@ def generate_content(
             # Determine which provider to use
             image_result = None
             
-            # For stock photo APIs, use the topic directly instead of generating an AI prompt
-            if "Unsplash" in image_provider or "Pexels" in image_provider:
-                # Use the topic for keyword-based search
-                search_query = topic
-                if "Unsplash" in image_provider:
-                    image_result = search_image_from_unsplash(search_query)
-                else:  # Pexels
-                    image_result = search_image_from_pexels(search_query)
+            # For stock photo APIs, the topic-based search started before the blog
+            if use_stock_photos:
+                image_result = stock_photo_future.result()
             else:
                 # For AI image generation, use the detailed prompt from LLM
-                img_prompt = image_prompt_chain.invoke({"blog_content": blog_content})
+                img_prompt = results["image_prompt"]
                 if "Replicate" in image_provider:
                     path = generate_image_from_replicate(img_prompt)
                     if path:
                         image_result = path
                 else:  # HuggingFace
-                    image_result = generate_image_from_huggingface(img_prompt)
+                    # WebP bytes go straight to st.image, cache hits are never re-encoded
+                    image_result = generate_image_bytes_from_huggingface(img_prompt)
+                    if image_result is None:
+                        image_result = create_placeholder_image(img_prompt)
+
+            if isinstance(image_result, Image.Image):
+                image_result = to_webp_bytes(image_result)
 
             if image_result:
                 st.image(image_result, caption=f"Imagen obtenida vía {image_provider}", use_container_width=True)
@@ -338,6 +396,7 @@ def main():
     This function sets up the main UI, renders the sidebar to get user inputs,
     and triggers the content generation process when the user clicks the button.
     """
+    warm_up_providers()
     st.subheader("Contenido Generado (PoC)")
 
     (
@@ -1,125 +1,120 @@
-BLOG_GENERATION_TEMPLATE = """
-    [INST] <<SYS>>
-    You are an expert content creator for blogs and websites.
-    MANDATORY: Every single word, including the TITLE and headings, MUST be in {target_language}.
-    <</SYS>>
+from string import Formatter
 
+# Shared verbatim by every template that uses the brand profile, so the
+# same tokens (and the provider's cached KV for them) are reused across chains.
+BRAND_CONTEXT_BLOCK = """
     BRAND PROFILE (Context):
     {brand_bio}
+"""
 
-    TASK DETAILS:
-    - TOPIC: {topic}
-    - AUDIENCE: {audience}
-    - OUTPUT LANGUAGE: {target_language}
+BLOG_SYSTEM_PROMPT = """
+    You are an expert content creator for blogs and websites.
+    MANDATORY: Every single word, including the TITLE and headings, MUST be in {target_language}.
 
     FINAL INSTRUCTIONS:
     1. Write a professional article (500-800 words) strictly in {target_language}.
-    2. Use the brand profile provided above to define the tone.
+    2. Use the brand profile provided by the user to define the tone.
     3. Use Markdown formatting.
+    """
+
+BLOG_USER_TEMPLATE = BRAND_CONTEXT_BLOCK + """
+    TASK DETAILS:
+    - TOPIC: {topic}
+    - AUDIENCE: {audience}
+    - OUTPUT LANGUAGE: {target_language}
 
     ARTICLE IN {target_language}:
-    [/INST]
     """
 
-TWITTER_ADAPTOR_TEMPLATE = """
-    [INST] <<SYS>>
+# Every template is a (system, user) pair: the static instructions travel in
+# the system message, which stays in the provider-side prompt cache, and the
+# user message starts with the shared brand block followed by the per-request
+# inputs, so the cacheable prefix is as long as possible.
+BLOG_GENERATION_TEMPLATE = (BLOG_SYSTEM_PROMPT, BLOG_USER_TEMPLATE)
+
+TWITTER_SYSTEM_PROMPT = """
     You are a social media expert. 
     MANDATORY: You must write the thread exclusively in {target_language}.
     Do not switch to any other language.
-    <</SYS>>
-
-    SOURCE CONTENT (Blog):
-    {blog_content}
-
-    BRAND CONTEXT:
-    {brand_bio}
 
     TASK:
     1. Create a Twitter thread (4-6 tweets) in {target_language} based on the source content.
-    2. Ensure the tone matches the BRAND CONTEXT.
+    2. Ensure the tone matches the BRAND PROFILE.
     3. Use emojis and maintain the specific language: {target_language}.
+    """
+
+TWITTER_USER_TEMPLATE = BRAND_CONTEXT_BLOCK + """
+    SOURCE CONTENT (Blog):
+    {blog_content}
 
     TWITTER THREAD IN {target_language}: 
-    [/INST]
     """
 
-INSTAGRAM_ADAPTOR_TEMPLATE = """
-    [INST] <<SYS>>
+TWITTER_ADAPTOR_TEMPLATE = (TWITTER_SYSTEM_PROMPT, TWITTER_USER_TEMPLATE)
+
+INSTAGRAM_SYSTEM_PROMPT = """
     You are a creative Instagram Copywriter. 
     MANDATORY: You must write the caption exclusively in {target_language}.
-    <</SYS>>
-
-    SOURCE CONTENT (Blog):
-    {blog_content}
-
-    BRAND CONTEXT:
-    {brand_bio}
 
     TASK:
     1. Create an engaging Instagram caption in {target_language}.
-    2. Tone: Visual, punchy, and aligned with BRAND CONTEXT.
+    2. Tone: Visual, punchy, and aligned with BRAND PROFILE.
     3. Include emojis and a call to action.
+    """
+
+INSTAGRAM_USER_TEMPLATE = BRAND_CONTEXT_BLOCK + """
+    SOURCE CONTENT (Blog):
+    {blog_content}
 
     INSTAGRAM CAPTION IN {target_language}: 
-    [/INST]
     """
 
-LINKEDIN_ADAPTOR_TEMPLATE = """
-    [INST] <<SYS>>
+INSTAGRAM_ADAPTOR_TEMPLATE = (INSTAGRAM_SYSTEM_PROMPT, INSTAGRAM_USER_TEMPLATE)
+
+LINKEDIN_SYSTEM_PROMPT = """
     You are a B2B Marketing specialist. 
     MANDATORY: You must write the post exclusively in {target_language}.
-    <</SYS>>
-
-    SOURCE CONTENT (Blog):
-    {blog_content}
-
-    BRAND CONTEXT:
-    {brand_bio}
 
     TASK:
     1. Transform the blog into a professional LinkedIn post in {target_language}.
-    2. Match the tone of the BRAND CONTEXT.
+    2. Match the tone of the BRAND PROFILE.
     3. Use professional formatting (bullet points) and 5 relevant hashtags.
+    """
+
+LINKEDIN_USER_TEMPLATE = BRAND_CONTEXT_BLOCK + """
+    SOURCE CONTENT (Blog):
+    {blog_content}
 
     LINKEDIN POST IN {target_language}: 
-    [/INST]
     """
 
-IMAGE_PROMPT_GENERATION_TEMPLATE = """
-    [INST] <<SYS>>
+LINKEDIN_ADAPTOR_TEMPLATE = (LINKEDIN_SYSTEM_PROMPT, LINKEDIN_USER_TEMPLATE)
+
+IMAGE_PROMPT_SYSTEM_PROMPT = """
     You are a professional Prompt Engineer for AI image generation (Stable Diffusion/SDXL).
     MANDATORY: Your output must be exclusively in ENGLISH.
-    <</SYS>>
-
-    ARTICLE SUMMARY:
-    {blog_content}
 
     TASK:
     1. Create a highly detailed image prompt in ENGLISH.
     2. Minimize the prompt output to a maximum of 100 words.
     3. Style: Photorealistic, cinematic lighting, 8k, professional photography.
     4. Do NOT include any text or words in the image.
+    """
+
+IMAGE_PROMPT_USER_TEMPLATE = """
+    ARTICLE SUMMARY:
+    {blog_content}
 
     IMAGE PROMPT (ENGLISH ONLY): 
-    [/INST]
     """
-    
-SCIENCE_DIVULGATION_TEMPLATE = """
-    [INST] <<SYS>>
-    You are an expert science communicator and educator. Your goal is to transform complex, technical academic papers into engaging, accessible, and accurate articles for a general audience (laypeople).
-    <</SYS>>
 
-    SCIENTIFIC CONTEXT (Retrieved from arXiv papers):
-    {documents}
-    
-    BRAND PROFILE (Context):
-    {brand_bio}
+IMAGE_PROMPT_GENERATION_TEMPLATE = (IMAGE_PROMPT_SYSTEM_PROMPT, IMAGE_PROMPT_USER_TEMPLATE)
 
-    TOPIC TO EXPLAIN: {topic}
-    TARGET LANGUAGE FOR THE OUTPUT: {target_language}
+SCIENCE_SYSTEM_PROMPT = """
+    You are an expert science communicator and educator. Your goal is to transform complex, technical academic papers into engaging, accessible, and accurate articles for a general audience (laypeople).
 
     INSTRUCTIONS:
-    1.  Use the brand profile provided above to define the tone.
+    1.  Use the brand profile provided by the user to define the tone.
     2.  **Simplify without losing rigor**: Use analogies to explain technical concepts (e.g., explain "Neural Networks" like "interconnected post-it notes").
     3.  **Focus on "The Why"**: Explain why this scientific advancement matters to the reader's daily life or the future of humanity.
     4.  **Structure**:
@@ -129,6 +124,92 @@ SCIENCE_DIVULGATION_TEMPLATE = """
         * **Conclusion**: A forward-looking closing statement.
     5.  **Source Attribution**: Explicitly mention that the insights are synthesized from recent research papers found on arXiv.
     6.  **Multilingual Output**: Write the entire final article in {target_language} with a minimum of 1500 words.
+    """
+
+SCIENCE_USER_TEMPLATE = BRAND_CONTEXT_BLOCK + """
+    SCIENTIFIC CONTEXT (Retrieved from arXiv papers):
+    {documents}
+
+    TOPIC TO EXPLAIN: {topic}
+    TARGET LANGUAGE FOR THE OUTPUT: {target_language}
+
+    SCIENTIFIC ARTICLE:
+    """
+
+SCIENCE_DIVULGATION_TEMPLATE = (SCIENCE_SYSTEM_PROMPT, SCIENCE_USER_TEMPLATE)
+
+# Rough characters-per-token ratio of BPE tokenizers on English prose.
+CHARS_PER_TOKEN = 4
+
+# Tokens kept free for the science article (1500+ words) in the context window.
+SCIENCE_ANSWER_TOKENS = 2500
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text without loading a tokenizer.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def _static_part(template: str | tuple[str, ...]) -> str:
+    """
+    Returns the literal text of a template, without its `{placeholders}`.
+    """
+    if isinstance(template, tuple):
+        template = "".join(template)
+    return "".join(literal for literal, *_ in Formatter().parse(template))
+
+# Token cost of each template's constant scaffold, computed once at import so
+# budget checks only need to measure the dynamic inputs.
+PROMPT_STATIC_TOKENS = {
+    name: estimate_tokens(_static_part(template))
+    for name, template in {
+        "blog": BLOG_GENERATION_TEMPLATE,
+        "twitter": TWITTER_ADAPTOR_TEMPLATE,
+        "instagram": INSTAGRAM_ADAPTOR_TEMPLATE,
+        "linkedin": LINKEDIN_ADAPTOR_TEMPLATE,
+        "image_prompt": IMAGE_PROMPT_GENERATION_TEMPLATE,
+        "science": SCIENCE_DIVULGATION_TEMPLATE,
+    }.items()
+}
+
+def remaining_budget(name: str, context_window: int, reserved: int = 0) -> int:
+    """
+    Computes how many tokens are left for dynamic inputs in a prompt.
+
+    Args:
+        name (str): The template name, a key of `PROMPT_STATIC_TOKENS`.
+        context_window (int): The model's context window, in tokens.
+        reserved (int, optional):   Tokens kept free for the answer or as a
+                                    safety margin. Defaults to 0.
+
+    Returns:
+        int: The token budget left for the template's variables (never negative).
+    """
+    return max(context_window - PROMPT_STATIC_TOKENS[name] - reserved, 0)
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Cuts a text so that it fits in a token budget.
+
+    The cut falls on the last paragraph break inside the budget when there is
+    one, so retrieved chunks are dropped whole rather than mid-sentence.
+
+    Args:
+        text (str): The text to fit, e.g. the retrieved RAG context.
+        max_tokens (int): The token budget, as given by `remaining_budget`.
+
+    Returns:
+        str: The text unchanged if it fits, otherwise its truncated start.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
 
-    SCIENTIFIC ARTICLE: [/INST]
-    """
\ No newline at end of file
+    truncated = text[:max_tokens * CHARS_PER_TOKEN]
+    paragraph_end = truncated.rfind("\n\n")
+    return truncated[:paragraph_end] if paragraph_end > 0 else truncated
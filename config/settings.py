@@ -1,27 +1,107 @@
 import os
+from dataclasses import dataclass, fields
 
 try:
     from dotenv import load_dotenv
-    
+
     load_dotenv()
 except:
     pass
 
-LOG_FILE_NAME = os.getenv("LOG_FILE_NAME","llm_model.log")
-LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
-LOG_BASE_DIR = os.getenv("LOG_BASE_DIR", "log")
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """
+    Application settings, read once from the environment at import time.
+
+    Each field is populated from the environment variable of the same name in
+    upper case (e.g. `groq_api_key` <- `GROQ_API_KEY`).
+    """
+    log_file_name: str = "llm_model.log"
+    log_level: str = "DEBUG"
+    log_base_dir: str = "log"
+
+    groq_api_key: str | None = None
+    groq_model: str | None = None
+
+    gemini_api_key: str | None = None
+    gemini_model: str | None = None
+
+    hf_token: str | None = None
+    hf_model: str | None = None
+
+    replicate_api_token: str | None = None
+    replicate_model: str | None = None
+
+    pexels_api_key: str | None = None
+    unsplash_access_key: str | None = None
+
+    # Smallest context window among the configured models, in tokens
+    llm_context_window: int = 8192
+
+    llm_cache_enabled: bool = False
+    llm_cache_path: str = ".langchain.db"
+
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_dir: str = "./llm_cache_db"
+
+    image_cache_enabled: bool = False
+    image_cache_dir: str = "./image_cache"
+    image_cache_size_mb: int = 500
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Builds the settings from the environment, keeping defaults for unset keys.
+
+        Returns:
+            Settings: The frozen application settings.
+        """
+        values = {}
+        for field in fields(cls):
+            value = os.getenv(field.name.upper())
+            # `KEY=` (e.g. left blank from .env.example) counts as unset
+            if value is None or not value.strip():
+                continue
+            if field.type is bool:
+                value = value.strip().lower() in ("1", "true", "yes")
+            elif field.type is int:
+                value = int(value)
+            elif field.type is float:
+                value = float(value)
+            values[field.name] = value
+        return cls(**values)
+
+settings = Settings.from_env()
+
+LOG_FILE_NAME = settings.log_file_name
+LOG_LEVEL = settings.log_level
+LOG_BASE_DIR = settings.log_base_dir
+
+GROQ_API_KEY = settings.groq_api_key
+GROQ_MODEL = settings.groq_model
+
+GEMINI_API_KEY = settings.gemini_api_key
+GEMINI_MODEL = settings.gemini_model
+
+HF_TOKEN = settings.hf_token
+HF_MODEL = settings.hf_model
+
+REPLICATE_API_TOKEN = settings.replicate_api_token
+REPLICATE_MODEL = settings.replicate_model
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL")
+PEXELS_API_KEY = settings.pexels_api_key
+UNSPLASH_ACCESS_KEY = settings.unsplash_access_key
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL")
+LLM_CONTEXT_WINDOW = settings.llm_context_window
 
-HF_TOKEN = os.getenv("HF_TOKEN")
-HF_MODEL = os.getenv("HF_MODEL")
+LLM_CACHE_ENABLED = settings.llm_cache_enabled
+LLM_CACHE_PATH = settings.llm_cache_path
 
-REPLICATE_API_TOKEN = os.getenv("REPLICATE_API_TOKEN")
-REPLICATE_MODEL = os.getenv("REPLICATE_MODEL")
+SEMANTIC_CACHE_ENABLED = settings.semantic_cache_enabled
+SEMANTIC_CACHE_THRESHOLD = settings.semantic_cache_threshold
+SEMANTIC_CACHE_DIR = settings.semantic_cache_dir
 
-PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
-UNSPLASH_ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY")
\ No newline at end of file
+IMAGE_CACHE_ENABLED = settings.image_cache_enabled
+IMAGE_CACHE_DIR = settings.image_cache_dir
+IMAGE_CACHE_SIZE_MB = settings.image_cache_size_mb
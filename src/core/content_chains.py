@@ -1,7 +1,16 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.language_models import BaseChatModel
-from src.models.llm_factory import get_llm_ollama, get_llm_groq, get_llm_gemini, get_llm
+from __future__ import annotations
+
+import asyncio
+from functools import cache
+from hashlib import sha256
+from typing import TYPE_CHECKING
+
+from src.core.logger.logger import Logger
+from src.models.llm_factory import get_llm
+from config.settings import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_DIR
+)
 from config.prompts import (
     BLOG_GENERATION_TEMPLATE,
     TWITTER_ADAPTOR_TEMPLATE,
@@ -11,111 +20,310 @@ from config.prompts import (
     SCIENCE_DIVULGATION_TEMPLATE
 )
 
-def create_chain(llm: BaseChatModel, template: str):
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+
+if LLM_CACHE_ENABLED:
+    # Exact-match cache consulted by every LLM call before hitting the provider
+    from langchain_core.globals import set_llm_cache
+    from langchain_community.cache import SQLiteCache
+
+    set_llm_cache(SQLiteCache(database_path=LLM_CACHE_PATH))
+
+# Short outputs get an explicit decode budget so the model cannot ramble.
+TWITTER_MAX_TOKENS = 400
+TWITTER_STOP = ["\n\n\n"]
+IMAGE_PROMPT_MAX_TOKENS = 180
+IMAGE_PROMPT_STOP = ["---", "OUTPUT:"]
+
+@cache
+def _lazy_langchain():
+    """
+    Imports the LangChain prompt and parser classes on first use.
+
+    Returns:
+        tuple: The `ChatPromptTemplate` and `StrOutputParser` classes.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    return ChatPromptTemplate, StrOutputParser
+
+@cache
+def _compile_prompt(template: str | tuple[str, str]):
+    """
+    Parses a prompt template once and keeps it in a registry for reuse.
+
+    Prompt templates are immutable, so every chain built from the same
+    template can share the same `ChatPromptTemplate` instance.
+
+    Args:
+        template (str | tuple[str, str]):   The prompt template to compile, or a
+                                            `(system, user)` pair of templates.
+
+    Returns:
+        ChatPromptTemplate: The compiled prompt.
+    """
+    ChatPromptTemplate, _ = _lazy_langchain()
+    if isinstance(template, tuple):
+        system_template, user_template = template
+        return ChatPromptTemplate.from_messages([
+            ("system", system_template),
+            ("human", user_template),
+        ])
+    return ChatPromptTemplate.from_template(template)
+
+def create_chain(llm: BaseChatModel, template: str | tuple[str, str], **partial_variables):
     """
     Creates a generic content generation chain.
 
     Args:
         llm (BaseChatModel): The language model to use.
-        template (str): The prompt template for the chain.
+        template (str | tuple[str, str]):   The prompt template for the chain, or a
+                                            `(system, user)` pair of templates.
+        **partial_variables: Prompt inputs that stay constant for the session
+                             (e.g. `brand_bio`, `target_language`). They are
+                             bound into the prompt once, so callers only pass
+                             the per-request inputs to `invoke`.
 
     Returns:
         A chain of transformations for content generation.
     """
-    prompt = ChatPromptTemplate.from_template(template)
+    _, StrOutputParser = _lazy_langchain()
+    prompt = _compile_prompt(template)
+    if partial_variables:
+        prompt = prompt.partial(**partial_variables)
     return prompt | llm | StrOutputParser()
 
 
 
-def create_blog_chain(llm_choice: str):
-    """
-    Creates a blog generation chain using the specified LLM.
+# Inputs compared by meaning in the semantic cache. Every other input (the
+# blog, the retrieved papers...) is long and must match exactly: embedding it
+# would truncate the short fields out of the vector.
+SEMANTIC_CACHE_INPUTS = ("topic", "audience")
 
-    Args:
-        llm_choice (str):   The choice of the language model provider 
-                            (e.g., "Gemini", "Groq", "Ollama").
-
-    Returns:
-        A chain of transformations for blog generation.
+def create_semantic_cache_store(embeddings: Embeddings, persist_directory: str = SEMANTIC_CACHE_DIR):
     """
-    llm = get_llm(llm_choice)
-    return create_chain(llm, BLOG_GENERATION_TEMPLATE)
+    Opens the vector store that backs every `SemanticCachedChain`.
 
-def create_blog_chain_ollama(model_name: str = "mistral"):
-    """
-    Creates a blog generation chain using an Ollama model.
+    Build it once and share it: each chain only filters it by its own namespace.
 
     Args:
-        model_name (str, optional): The name of the Ollama model to use. 
-                                    Defaults to "mistral".
+        embeddings (Embeddings):    The embedding model used to vectorize
+                                    requests (share the RAG one to avoid
+                                    loading a second copy).
+        persist_directory (str, optional): Where the cache collection is stored.
 
     Returns:
-        A chain of transformations for blog generation.
+        Chroma: The response cache collection.
     """
-    llm = get_llm_ollama(model_name)
-    return create_chain(llm, BLOG_GENERATION_TEMPLATE)
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        collection_name="llm_response_cache",
+        embedding_function=embeddings,
+        persist_directory=persist_directory,
+    )
 
-def create_blog_chain_groq():
+class SemanticCachedChain(Logger):
     """
-    Creates a blog generation chain using a Groq model.
+    Wraps a `prompt | llm | parser` chain with a semantic response cache.
 
-    Returns:
-        A chain of transformations for blog generation.
+    The short user-facing inputs (`SEMANTIC_CACHE_INPUTS`) are embedded and
+    compared against previous requests made through the same prompt (template
+    and bound session constants) with exactly the same remaining inputs. When
+    a previous request is similar enough its stored completion is returned
+    instead of calling the LLM again. Chains without semantic inputs (the
+    adaptors, the image prompt) only get exact-match hits, read by key.
     """
-    llm = get_llm_groq() 
-    return create_chain(llm, BLOG_GENERATION_TEMPLATE)
+    def __init__(
+        self,
+        chain,
+        store,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+    ):
+        """
+        Initializes the cache wrapper.
+
+        Args:
+            chain: The chain to wrap, as returned by `create_chain`.
+            store:  The shared cache collection, from `create_semantic_cache_store`.
+            threshold (float, optional):    Minimum relevance score (0-1) for a
+                                            cached answer to be reused.
+        """
+        self.chain = chain
+        self.threshold = threshold
+        self.store = store
+        # The prompt rendered without its dynamic inputs identifies the
+        # template and the session constants bound into it.
+        prompt = chain.first
+        static_prompt = prompt.invoke({name: "" for name in prompt.input_variables}).to_string()
+        self.namespace = sha256(static_prompt.encode("utf-8")).hexdigest()
+
+    def _cache_key(self, inputs: dict) -> tuple[str, str]:
+        """
+        Splits the inputs into the text to embed and the exact-match namespace.
+
+        Returns:
+            tuple[str, str]:    The semantic inputs as text, and the namespace
+                                that also pins every other input by its hash.
+        """
+        text = "\n".join(
+            f"{name}: {value}" for name, value in sorted(inputs.items()) if name in SEMANTIC_CACHE_INPUTS
+        )
+        exact = sorted((name, value) for name, value in inputs.items() if name not in SEMANTIC_CACHE_INPUTS)
+        if not exact:
+            return text, self.namespace
+
+        digest = sha256(self.namespace.encode("utf-8"))
+        for name, value in exact:
+            digest.update(f"\0{name}\0{value}".encode("utf-8"))
+        return text, digest.hexdigest()
 
-def create_blog_chain_gemini():
+    def _lookup(self, key: tuple[str, str]) -> str | None:
+        text, namespace = key
+        try:
+            if not text:
+                # No semantic inputs (e.g. the adaptors): the namespace alone is
+                # the key, so read it by id instead of embedding an empty query
+                stored = self.store.get(ids=[namespace], include=["metadatas"])
+                if stored["metadatas"]:
+                    self.log.debug("Exact cache hit.")
+                    return stored["metadatas"][0]["response"]
+                return None
+            results = self.store.similarity_search_with_relevance_scores(
+                text, k=1, filter={"namespace": namespace}
+            )
+        except Exception as e:
+            self.log.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+        if results and results[0][1] >= self.threshold:
+            self.log.debug(f"Semantic cache hit (score {results[0][1]:.3f}).")
+            return results[0][0].metadata["response"]
+        return None
+
+    def _save(self, key: tuple[str, str], response: str) -> None:
+        text, namespace = key
+        try:
+            self.store.add_texts(
+                [text],
+                metadatas=[{"namespace": namespace, "response": response}],
+                # Exact-only entries are stored under their key, for `_lookup` to read back
+                ids=None if text else [namespace],
+            )
+        except Exception as e:
+            self.log.warning(f"Semantic cache write failed: {e}")
+
+    def invoke(self, inputs: dict, config=None) -> str:
+        key = self._cache_key(inputs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.chain.invoke(inputs, config)
+        self._save(key, response)
+        return response
+
+    async def ainvoke(self, inputs: dict, config=None) -> str:
+        # The store calls block (embedding, Chroma I/O), keep them off the event
+        # loop so concurrent chains in `ainvoke_all` still overlap
+        key = self._cache_key(inputs)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+        response = await self.chain.ainvoke(inputs, config)
+        await asyncio.to_thread(self._save, key, response)
+        return response
+
+    def stream(self, inputs: dict, config=None):
+        key = self._cache_key(inputs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in self.chain.stream(inputs, config):
+            chunks.append(chunk)
+            yield chunk
+        self._save(key, "".join(chunks))
+
+def create_blog_chain(llm_choice: str, **partial_variables):
     """
-    Creates a blog generation chain using a Gemini model.
+    Creates a blog generation chain using the specified LLM.
+
+    Args:
+        llm_choice (str):   The choice of the language model provider 
+                            (e.g., "Gemini", "Groq", "Ollama").
+        **partial_variables: Session constants bound into the prompt
+                             (see `create_chain`).
 
     Returns:
         A chain of transformations for blog generation.
     """
-    llm = get_llm_gemini() 
-    return create_chain(llm, BLOG_GENERATION_TEMPLATE)
+    llm = get_llm(llm_choice)
+    return create_chain(llm, BLOG_GENERATION_TEMPLATE, **partial_variables)
 
-def create_twitter_adaptor_chain(llm_choice: str):
+def create_twitter_adaptor_chain(llm_choice: str, **partial_variables):
     """
     Creates a chain to adapt content for Twitter using the specified LLM.
 
     Args:
         llm_choice (str):   The choice of the language model provider 
                             (e.g., "Gemini", "Groq", "Ollama").
+        **partial_variables: Session constants bound into the prompt
+                             (see `create_chain`).
 
     Returns:
         A chain of transformations for adapting content to Twitter format.
     """
-    llm = get_llm(llm_choice)
-    return create_chain(llm, TWITTER_ADAPTOR_TEMPLATE)
+    llm = get_llm(llm_choice, max_tokens=TWITTER_MAX_TOKENS).bind(stop=TWITTER_STOP)
+    return create_chain(llm, TWITTER_ADAPTOR_TEMPLATE, **partial_variables)
 
-def create_instagram_adaptor_chain(llm_choice: str):
+def create_instagram_adaptor_chain(llm_choice: str, **partial_variables):
     """
     Creates a chain to adapt content for Instagram using the specified LLM.
 
     Args:
         llm_choice (str):   The choice of the language model provider 
                             (e.g., "Gemini", "Groq", "Ollama").
+        **partial_variables: Session constants bound into the prompt
+                             (see `create_chain`).
 
     Returns:
         A chain of transformations for adapting content to Instagram format.
     """
     llm = get_llm(llm_choice)
-    return create_chain(llm, INSTAGRAM_ADAPTOR_TEMPLATE)
+    return create_chain(llm, INSTAGRAM_ADAPTOR_TEMPLATE, **partial_variables)
 
-def create_linkedin_adaptor_chain(llm_choice: str):
+def create_linkedin_adaptor_chain(llm_choice: str, **partial_variables):
     """
     Creates a chain to adapt content for LinkedIn using the specified LLM.
 
     Args:
         llm_choice (str):   The choice of the language model provider 
                             (e.g., "Gemini", "Groq", "Ollama").
+        **partial_variables: Session constants bound into the prompt
+                             (see `create_chain`).
 
     Returns:
         A chain of transformations for adapting content to LinkedIn format.
     """
     llm = get_llm(llm_choice)
-    return create_chain(llm, LINKEDIN_ADAPTOR_TEMPLATE)
+    return create_chain(llm, LINKEDIN_ADAPTOR_TEMPLATE, **partial_variables)
+
+async def ainvoke_all(chains: dict, inputs: dict) -> dict:
+    """
+    Invokes several chains on the same inputs concurrently.
+
+    Args:
+        chains (dict): The chains to run, keyed by name.
+        inputs (dict): The inputs passed to every chain.
+
+    Returns:
+        dict: The output of each chain, keyed by the same names.
+    """
+    outputs = await asyncio.gather(*(chain.ainvoke(inputs) for chain in chains.values()))
+    return dict(zip(chains, outputs))
 
 def create_image_prompt_chain(llm_choice: str):
     """
@@ -128,9 +336,9 @@ def create_image_prompt_chain(llm_choice: str):
     Returns:
         A chain of transformations for generating an image prompt.
     """
-    llm = get_llm(llm_choice)
+    llm = get_llm(llm_choice, max_tokens=IMAGE_PROMPT_MAX_TOKENS).bind(stop=IMAGE_PROMPT_STOP)
     return create_chain(llm, IMAGE_PROMPT_GENERATION_TEMPLATE)
 
-def generate_science_post_chain(llm_choice: str):
+def generate_science_post_chain(llm_choice: str, **partial_variables):
     llm = get_llm(llm_choice)
-    return create_chain(llm, SCIENCE_DIVULGATION_TEMPLATE)
\ No newline at end of file
+    return create_chain(llm, SCIENCE_DIVULGATION_TEMPLATE, **partial_variables)
\ No newline at end of file
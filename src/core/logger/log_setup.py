@@ -1,10 +1,55 @@
+import atexit
 import logging
 import logging.config
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 from config.settings import LOG_FILE_NAME, LOG_LEVEL, LOG_BASE_DIR
 
+LOG_FORMAT = '%(asctime)s [%(levelname)s] - %(name)s - %(funcName)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Records for the log file go through this queue; a background listener
+# thread owns the RotatingFileHandler so callers never block on disk I/O.
+_log_queue = queue.SimpleQueue()
+_listener = None
+_configured = False
+
+def _start_file_listener(log_path: Path) -> None:
+    """
+    Starts the background thread that writes queued records to the log file.
+
+    Called once, by the first `log_setup()`; the thread is stopped at exit.
+    """
+    global _listener
+
+    file_handler = RotatingFileHandler(
+        str(log_path),
+        maxBytes=1024 * 1024 * 5,   # 5 MB
+        backupCount=5,              # Keep 5 backup files
+        encoding='utf-8',
+    )
+    file_handler.setLevel(LOG_LEVEL)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+
+    _listener = QueueListener(_log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_file_listener)
+
+def _stop_file_listener() -> None:
+    """
+    Flushes the pending records and stops the log file writer thread.
+    """
+    if _listener is not None:
+        _listener.stop()
+
 def log_setup():
+    # Every module that logs calls this on import; only the first call configures
+    global _configured
+    if _configured:
+        return
+
     # Ensure the log directory exists
     log_path = Path(LOG_FILE_NAME)
     if not log_path.is_absolute():
@@ -24,27 +69,20 @@ def log_setup():
         'version': 1,
         'disable_existing_loggers': False,
         'formatters': {
-            'standard': {
-                'format': '%(asctime)s [%(levelname)s] - %(name)s - %(funcName)s: %(message)s',
-                'datefmt': '%Y-%m-%d %H:%M:%S'
-            },
             'colored_console': {
                 '()': 'colorlog.ColoredFormatter', # Use the colorlog class
-                'format': '%(log_color)s%(asctime)s [%(levelname)s] - %(name)s - %(funcName)s: %(message)s',
-                'datefmt': '%Y-%m-%d %H:%M:%S',
+                'format': '%(log_color)s' + LOG_FORMAT,
+                'datefmt': DATE_FORMAT,
                 'log_colors': color_scheme,
             },
         },
         'handlers': {
             'file': {
                 'level': LOG_LEVEL,
-                # Use RotatingFileHandler to prevent disk fill-up
-                'class': 'logging.handlers.RotatingFileHandler',
-                'filename': str(log_path),
-                'maxBytes': 1024 * 1024 * 5, # 5 MB
-                'backupCount': 5,            # Keep 5 backup files
-                'formatter': 'standard',
-                'encoding': 'utf-8',
+                # Only enqueues records; the RotatingFileHandler (which prevents
+                # disk fill-up) runs in the listener thread
+                '()': QueueHandler,
+                'queue': _log_queue,
             },
             'console': {
                 'level': LOG_LEVEL,
@@ -85,4 +123,6 @@ def log_setup():
         }
     }
 
-    logging.config.dictConfig(logging_config)
\ No newline at end of file
+    logging.config.dictConfig(logging_config)
+    _start_file_listener(log_path)
+    _configured = True
@@ -1,14 +1,13 @@
 import logging
+from functools import cached_property
 
 class Logger:
     """
     A logger mixin class that configures and provides a logging instance for views.
     """
-    @property
+    @cached_property
     def log(self):
-        # Create the logger only when accessed (lazy loading)
-        if not hasattr(self, '_log'):
-            # Use the class name as the logger name
-            self._log = logging.getLogger(self.__class__.__name__)
-        return self._log
-        
\ No newline at end of file
+        # Create the logger only when accessed (lazy loading); cached_property
+        # stores it on the instance so later accesses are a plain attribute read
+        # Use the class name as the logger name
+        return logging.getLogger(self.__class__.__name__)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import math
 import os
 import pysqlite3
 import sys
@@ -8,13 +9,113 @@ from langchain_community.vectorstores.utils import filter_complex_metadata
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_classic.embeddings import CacheBackedEmbeddings
+from langchain_classic.storage import LocalFileStore
 import shutil
+import threading
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator
+import numpy as np
 
 from src.core.logger.log_setup import log_setup
 from src.core.logger.logger import Logger
 
 log_setup()
 
+# Chunks written to Chroma per upsert: large enough to amortize the SQLite
+# transaction, small enough to stay under Chroma's maximum batch size
+INGEST_BATCH_SIZE = 200
+
+# Chunks returned per query and the minimum relevance score (0-1) they need
+RETRIEVAL_K = 3
+RETRIEVAL_SCORE_THRESHOLD = 0.35
+
+# On-disk cache of chunk embeddings, keyed by a hash of the chunk text
+EMBEDDING_CACHE_DIR = "./embedding_cache"
+
+# Queries whose embeddings are at least this similar share the cached context
+QUERY_CACHE_THRESHOLD = 0.95
+# Maximum number of queries kept in the context cache (least recently used go first)
+QUERY_CACHE_SIZE = 1024
+
+def _batched(items: Iterable, size: int = INGEST_BATCH_SIZE) -> Iterator[list]:
+    """
+    Yields consecutive lists of at most `size` elements, consuming `items` lazily.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _relevance_score(distance: float) -> float:
+    """
+    Converts a Chroma distance to a 0-1 relevance score.
+
+    The collection uses Chroma's default "l2" space, and the embeddings are
+    unit vectors, so this is the same conversion LangChain applies to it.
+    """
+    return 1.0 - distance / math.sqrt(2)
+
+def _embedder_model_kwargs() -> dict:
+    """
+    Chooses where and in which precision the embedding model runs.
+
+    On a CUDA device the model is loaded in half precision (bf16 when the GPU
+    supports it, fp16 otherwise); without CUDA it stays on CPU in fp32.
+
+    Returns:
+        dict: The `model_kwargs` for `HuggingFaceEmbeddings`.
+    """
+    try:
+        import torch
+    except ImportError:
+        return {"device": "cpu"}
+
+    if not torch.cuda.is_available():
+        return {"device": "cpu"}
+
+    dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    return {"device": "cuda", "model_kwargs": {"torch_dtype": dtype}}
+
+@lru_cache(maxsize=1)
+def _get_embedder() -> HuggingFaceEmbeddings:
+    """
+    Loads the sentence-transformer embedding model once per process.
+
+    Every `ScienceRAG` instance (and the semantic response cache) shares this
+    model instead of loading its own copy.
+
+    Returns:
+        HuggingFaceEmbeddings: The shared embedding model.
+    """
+    return HuggingFaceEmbeddings(
+        model_name="all-MiniLM-L6-v2",
+        model_kwargs=_embedder_model_kwargs(),
+        encode_kwargs={
+            "batch_size": 64,               # Embed chunks in batches, not one by one
+            # Unit vectors, which the L2 -> relevance score conversion assumes
+            "normalize_embeddings": True,
+        }
+    )
+
+@lru_cache(maxsize=1)
+def _get_document_embedder() -> CacheBackedEmbeddings:
+    """
+    Wraps the shared embedder with a persistent per-chunk cache.
+
+    Re-ingesting a paper (or overlapping search results) only embeds the
+    chunks that were never seen before; queries go straight to the model.
+
+    Returns:
+        CacheBackedEmbeddings: The cached embedder used by the vector store.
+    """
+    return CacheBackedEmbeddings.from_bytes_store(
+        _get_embedder(),
+        LocalFileStore(EMBEDDING_CACHE_DIR),
+        namespace="all-MiniLM-L6-v2",
+        key_encoder="sha256",
+    )
+
 class ScienceRAG:
     """
     A Retrieval-Augmented Generation (RAG) engine focused on scientific papers from arXiv.
@@ -35,9 +136,23 @@ class ScienceRAG:
         self.topic = topic
         
         self.log = Logger().log
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.embeddings = _get_embedder()
         self.persist_directory = "./chroma_db"
         self.vector_store = None
+        # Retrieved context per canonical topic, reused until the corpus changes.
+        # Dict order doubles as LRU order; each key also has a unit query
+        # vector (row i of `_query_vectors` belongs to `_query_keys[i]`, rows
+        # past the last key are unused) so
+        # paraphrased queries can reuse an entry too.
+        self._context_cache: dict[str, str] = {}
+        self._query_keys: list[str] = []
+        self._query_vectors: np.ndarray | None = None
+        # The app shares one engine across sessions: every read or write of
+        # the three structures above happens under this lock
+        self._cache_lock = threading.Lock()
+        # Bumped on every clear; a retrieval that started before the corpus
+        # changed must not write its stale context back
+        self._cache_generation = 0
 
     def ingest_papers(self, query: str, max_results: int = 2) -> str:
         """
@@ -51,36 +166,303 @@ class ScienceRAG:
             str: A status message indicating the result of the ingestion.
         """
         try:
-            self.log.debug(f"Searching for papers related to: {query}...")
-            loader = ArxivLoader(
-                query=query, 
-                load_max_docs=max_results,
-                load_all_available_meta=True
-            )
-            docs = loader.load()
-            
-            if not docs:
-                self.log.warning("No papers found for the given query.")
-                return "No se han encontrado papers para la búsqueda."
-            
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=600, 
-                chunk_overlap=50
-            )
-            splits = text_splitter.split_documents(docs)
-            cleaned_splits = filter_complex_metadata(splits)
-            
-            self.vector_store = Chroma.from_documents(
-                documents=cleaned_splits, 
-                embedding=self.embeddings,
-                persist_directory=self.persist_directory
-            )
-            self.log.debug("Papers indexed successfully.")
-            return f"{len(docs)} paper(s) sobre '{query}' han sido indexados."
+            docs = self._arxiv_loader(query, max_results).load()
+            docs, message = self._pending_papers(query, docs)
+            if message:
+                return message
+
+            vector_store = self._get_vector_store()
+            for batch in _batched(self._split_documents(docs)):
+                vector_store.add_documents(batch)
+            return self._finish_ingest(query, docs)
+        except Exception as e:
+            self.log.error(f"Error while indexing papers: {e}")
+            return f"Error al indexar: {e}"
+
+    async def aingest_papers(self, query: str, max_results: int = 2) -> str:
+        """
+        Asynchronous version of `ingest_papers`.
+
+        The arXiv download and the embedding/indexing run off the event loop,
+        so callers can overlap ingestion with other I/O (e.g. LLM calls).
+
+        Args:
+            query (str): The search query for arXiv.
+            max_results (int, optional): The maximum number of papers to download. Defaults to 2.
+
+        Returns:
+            str: A status message indicating the result of the ingestion.
+        """
+        try:
+            docs = await self._arxiv_loader(query, max_results).aload()
+            docs, message = self._pending_papers(query, docs)
+            if message:
+                return message
+
+            vector_store = self._get_vector_store()
+            for batch in _batched(self._split_documents(docs)):
+                await vector_store.aadd_documents(batch)
+            return self._finish_ingest(query, docs)
         except Exception as e:
             self.log.error(f"Error while indexing papers: {e}")
             return f"Error al indexar: {e}"
 
+    def _arxiv_loader(self, query: str, max_results: int) -> ArxivLoader:
+        """
+        Builds the arXiv loader shared by the sync and async ingestion paths.
+        """
+        self.log.debug(f"Searching for papers related to: {query}...")
+        return ArxivLoader(
+            query=query, 
+            load_max_docs=max_results,
+            load_all_available_meta=True
+        )
+
+    def _pending_papers(self, query: str, docs: list) -> tuple[list, str | None]:
+        """
+        Keeps the downloaded papers that still need to be indexed.
+
+        Args:
+            query (str): The search query for arXiv.
+            docs (list): The documents returned by the arXiv loader.
+
+        Returns:
+            tuple[list, str | None]:    The papers to index, and a status message
+                                        when there is nothing left to index.
+        """
+        if not docs:
+            self.log.warning("No papers found for the given query.")
+            return [], "No se han encontrado papers para la búsqueda."
+
+        docs = self._drop_indexed_papers(docs)
+        if not docs:
+            self.log.debug("All papers found were already indexed.")
+            return [], f"Los papers sobre '{query}' ya estaban indexados."
+        return docs, None
+
+    def _finish_ingest(self, query: str, docs: list) -> str:
+        """
+        Invalidates the cached contexts after new papers were stored.
+
+        Returns:
+            str: The status message of a successful ingestion.
+        """
+        self._clear_context_cache()
+        self.log.debug("Papers indexed successfully.")
+        return f"{len(docs)} paper(s) sobre '{query}' han sido indexados."
+
+    def _drop_indexed_papers(self, docs: list) -> list:
+        """
+        Removes the papers whose arXiv entry is already in the vector store.
+
+        Overlapping searches often return the same papers; skipping them avoids
+        splitting, embedding and storing their chunks a second time.
+
+        Args:
+            docs (list): The documents returned by the arXiv loader.
+
+        Returns:
+            list: The documents that are not indexed yet.
+        """
+        entry_ids = [doc.metadata.get("entry_id") for doc in docs if doc.metadata.get("entry_id")]
+        if not entry_ids or not os.path.exists(self.persist_directory):
+            return docs
+
+        data = self._get_vector_store().get(
+            where={"entry_id": {"$in": entry_ids}},
+            include=["metadatas"]
+        )
+        indexed = {m.get("entry_id") for m in data["metadatas"] or []}
+        return [doc for doc in docs if doc.metadata.get("entry_id") not in indexed]
+
+    def _split_documents(self, docs: list) -> Iterator:
+        """
+        Splits the downloaded papers into chunks and drops unsupported metadata.
+
+        Chunks are produced one paper at a time, so ingestion can store them
+        in batches without holding every chunk of every paper in memory.
+
+        Args:
+            docs (list): The documents returned by the arXiv loader.
+
+        Yields:
+            Document: The chunks ready to be embedded and stored.
+        """
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=600, 
+            chunk_overlap=50
+        )
+        # Filter once per paper rather than once per chunk: the splitter copies
+        # the metadata into every chunk, so it only copies the primitive fields.
+        for doc in filter_complex_metadata(docs):
+            yield from text_splitter.split_documents([doc])
+
+    @staticmethod
+    def _topic_key(user_query: str) -> str:
+        """
+        Canonicalizes a query so trivially different spellings share a cache entry.
+        """
+        return " ".join(user_query.lower().split())
+
+    @staticmethod
+    def _join_context(docs: list) -> str:
+        """
+        Joins retrieved chunks in a deterministic order.
+
+        Near-tied similarity scores can come back in a different order between
+        calls; sorting by source title and content makes the same set of
+        chunks always render the same text, so provider prompt caches hit.
+        """
+        ordered = sorted(
+            docs,
+            key=lambda doc: (doc.metadata.get('Title') or doc.metadata.get('title') or "", doc.page_content)
+        )
+        return "\n\n".join(doc.page_content for doc in ordered)
+
+    @staticmethod
+    def _unit_vector(vector: list[float]) -> np.ndarray:
+        """
+        Converts an embedding to a float32 unit vector, so a dot product is its cosine.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _touch_context(self, key: str) -> str:
+        """
+        Returns a cached context and marks it as the most recently used.
+
+        The caller must hold `_cache_lock`.
+        """
+        context = self._context_cache.pop(key)
+        self._context_cache[key] = context
+        return context
+
+    def _cached_context(self, key: str) -> str | None:
+        """
+        Returns the cached context of an exact canonical query, if any.
+        """
+        with self._cache_lock:
+            if key not in self._context_cache:
+                return None
+            return self._touch_context(key)
+
+    def _similar_context(self, query_vector: np.ndarray) -> str | None:
+        """
+        Looks up the cached context of the most similar previous query.
+
+        Args:
+            query_vector (np.ndarray): The unit embedding of the new query.
+
+        Returns:
+            str | None: The cached context if a previous query scores at least
+                        `QUERY_CACHE_THRESHOLD`, otherwise None.
+        """
+        with self._cache_lock:
+            if not self._query_keys:
+                return None
+
+            # One BLAS matrix-vector product over the used rows of the buffer
+            scores = self._query_vectors[:len(self._query_keys)] @ query_vector
+            best = int(np.argmax(scores))
+            if scores[best] < QUERY_CACHE_THRESHOLD:
+                return None
+
+            self.log.debug(f"Context cache hit for a similar query (score {scores[best]:.3f}).")
+            return self._touch_context(self._query_keys[best])
+
+    def _remember_context(self, key: str, query_vector: np.ndarray, context: str, generation: int) -> None:
+        """
+        Caches a retrieved context, evicting the least recently used entry when full.
+
+        The context is dropped if the cache was cleared since `generation`
+        was read, i.e. while it was being retrieved.
+        """
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                self.log.debug("Corpus changed during retrieval, context not cached.")
+                return
+
+            if key in self._context_cache:
+                # Another session retrieved the same query meanwhile
+                self._context_cache[key] = context
+                self._touch_context(key)
+                return
+
+            if self._query_vectors is None:
+                # Preallocated once as a C-contiguous float32 matrix, so inserts
+                # and evictions never copy the other cached vectors
+                self._query_vectors = np.empty((QUERY_CACHE_SIZE, query_vector.shape[0]), dtype=np.float32)
+
+            if len(self._context_cache) >= QUERY_CACHE_SIZE:
+                oldest = next(iter(self._context_cache))
+                del self._context_cache[oldest]
+                # Move the last row into the freed slot to keep the used rows packed
+                row = self._query_keys.index(oldest)
+                last_key = self._query_keys.pop()
+                if row < len(self._query_keys):
+                    self._query_keys[row] = last_key
+                    self._query_vectors[row] = self._query_vectors[len(self._query_keys)]
+
+            self._context_cache[key] = context
+            self._query_vectors[len(self._query_keys)] = query_vector
+            self._query_keys.append(key)
+
+    def _clear_context_cache(self) -> None:
+        """
+        Forgets every cached context, e.g. after the corpus changes.
+        """
+        with self._cache_lock:
+            self._context_cache.clear()
+            self._query_keys.clear()
+            self._cache_generation += 1
+
+    def _get_vector_store(self) -> Chroma:
+        """
+        Returns the persistent vector store, opening it on first use.
+
+        The same handle is reused by ingestion and retrieval until the
+        database is reset.
+        """
+        if not self.vector_store:
+            self.vector_store = Chroma(persist_directory=self.persist_directory, embedding_function=_get_document_embedder())
+        return self.vector_store
+
+    def _search_by_vector(self, query_vector: np.ndarray) -> list:
+        """
+        Returns the chunks closest to an already-embedded query.
+
+        Equivalent to a `similarity_score_threshold` retriever, but reuses the
+        query embedding computed for the context cache instead of having
+        Chroma embed the query a second time.
+
+        Args:
+            query_vector (np.ndarray): The unit embedding of the query.
+
+        Returns:
+            list: Up to `RETRIEVAL_K` documents scoring at least `RETRIEVAL_SCORE_THRESHOLD`.
+        """
+        results = self._get_vector_store().similarity_search_by_vector_with_relevance_scores(
+            query_vector.tolist(), k=RETRIEVAL_K
+        )
+        return [doc for doc, distance in results if _relevance_score(distance) >= RETRIEVAL_SCORE_THRESHOLD]
+
+    def _retrieve(self, key: str, query_vector: np.ndarray) -> str:
+        """
+        Searches the vector store for a query and caches the joined context.
+
+        Args:
+            key (str): The canonical query, from `_topic_key`.
+            query_vector (np.ndarray): The unit embedding of the query.
+
+        Returns:
+            str: The concatenated page content of the relevant documents.
+        """
+        with self._cache_lock:
+            generation = self._cache_generation
+        context = self._join_context(self._search_by_vector(query_vector))
+        self._remember_context(key, query_vector, context, generation)
+        return context
 
     def get_context(self, user_query: str) -> str:
         """
@@ -92,25 +474,21 @@ class ScienceRAG:
         Returns:
             str: A string containing the concatenated page content of relevant documents.
         """
-        if not self.vector_store:
-            self.vector_store = Chroma(persist_directory=self.persist_directory, embedding_function=self.embeddings)
-            
-        retriever = self.vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={
-                "k": 3,
-                "score_threshold": 0.35
-            }
-        )
-        
+        key = self._topic_key(user_query)
+        context = self._cached_context(key)
+        if context is not None:
+            return context
+
         try:
-            relevant_docs = retriever.invoke(user_query)
+            query_vector = self._unit_vector(self.embeddings.embed_query(key))
+            context = self._similar_context(query_vector)
+            if context is not None:
+                return context
+            return self._retrieve(key, query_vector)
         except Exception as e:
             self.log.warning(f"No relevant documents found for query: {user_query}")
             return ""
-        
-        return "\n\n".join([doc.page_content for doc in relevant_docs])
-    
+
     def list_indexed_papers(self) -> list[str]:
         """
         Lists the unique titles of all papers currently indexed in the vector store.
@@ -122,24 +500,14 @@ class ScienceRAG:
             self.vector_store = None
             return []
         try:
-            if not self.vector_store:
-                self.vector_store = Chroma(
-                    persist_directory=self.persist_directory, 
-                    embedding_function=self.embeddings
-                )
-            
-            data = self.vector_store.get()
+            # Only the metadata is needed; skip loading every chunk's text
+            data = self._get_vector_store().get(include=["metadatas"])
             metadatos = data['metadatas']
             
             if not metadatos:
                 return []
 
-            
-            titles = set()
-            for m in metadatos:
-                title = m.get('Title') or m.get('title') or "Unknown Title"
-                titles.add(title)
-                
+            titles = {m.get('Title') or m.get('title') or "Unknown Title" for m in metadatos}
             return list(titles)
         except Exception as e:
             self.log.error(f"Error while listing indexed papers: {e}")
@@ -165,4 +533,7 @@ class ScienceRAG:
             return "Error: Database is currently locked by the system. Try restarting the session."
         except Exception as e:
             self.log.error(f"Error while resetting database: {e}")
-            return f"Reset failed: {e}"
\ No newline at end of file
+            return f"Reset failed: {e}"
+        finally:
+            # After the store is gone, so no retrieval can cache its old content
+            self._clear_context_cache()
\ No newline at end of file
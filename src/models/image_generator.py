@@ -8,23 +8,232 @@ includes a function to create a placeholder image as a fallback.
 from PIL import Image
 import time
 import random
+import threading
 from huggingface_hub import InferenceClient
+from huggingface_hub.errors import BadRequestError, HfHubHTTPError, InferenceTimeoutError
 from huggingface_hub.utils import RepositoryNotFoundError
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import replicate
 from io import BytesIO
+from functools import lru_cache, wraps
+from hashlib import blake2b, sha256
+from pathlib import Path
+from typing import Iterable
+import os
+import tempfile
 
 from src.core.logger.logger import Logger
 from src.core.logger.log_setup import log_setup 
 from config.settings import (
     HF_TOKEN, HF_MODEL, 
     REPLICATE_API_TOKEN, REPLICATE_MODEL,
-    PEXELS_API_KEY, UNSPLASH_ACCESS_KEY
+    PEXELS_API_KEY, UNSPLASH_ACCESS_KEY,
+    IMAGE_CACHE_ENABLED, IMAGE_CACHE_DIR, IMAGE_CACHE_SIZE_MB
 )
 
 log_setup()
 log = Logger().log
 
+# Generated images are stored here under a name derived from their content;
+# past this size the least recently written ones are deleted
+GENERATED_IMAGES_DIR = "generated_images"
+GENERATED_IMAGES_SIZE_MB = 500
+
+# (connect, read) seconds for stock-photo and download requests: fail fast on
+# unreachable hosts, but leave room for slow image transfers
+HTTP_TIMEOUT = (5, 30)
+# Upper bound for a single Hugging Face text-to-image request
+HF_TIMEOUT = 120
+# Diffusion time grows linearly with the step count; past ~30 steps modern
+# schedulers add little visible detail. 1024px is SDXL's native resolution.
+HF_IMAGE_SIZE = (1024, 1024)
+HF_INFERENCE_STEPS = 30
+# WebP quality of Hugging Face renders kept in the image cache or returned as bytes
+CACHED_WEBP_QUALITY = 85
+
+# One pooled session for every stock-photo and download request, so repeated
+# calls reuse the TCP/TLS connection instead of opening a new one each time.
+# Rate limits and transient server errors are retried with backoff; the final
+# response is still returned so callers can branch on its status code.
+# Timeouts are not retried (a failed connect gets one more try), so an
+# unreachable host fails within 2x5s and a stalled transfer within 30s.
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(
+        total=3,
+        connect=1,
+        read=0,
+        other=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+))
+
+class CircuitBreaker:
+    """
+    Stops calling a provider for a while after repeated failures.
+
+    After `fail_max` consecutive failures the breaker opens and `allow()`
+    returns False, so callers fall back immediately instead of waiting on a
+    provider that is down. Once `reset_timeout` seconds have passed, one
+    trial call is let through: a success closes the breaker again, a failure
+    keeps it open for another `reset_timeout`.
+    """
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 60):
+        """
+        Initializes a closed circuit breaker.
+
+        Args:
+            name (str): The provider name, used in log messages.
+            fail_max (int, optional): Consecutive failures that open the breaker. Defaults to 5.
+            reset_timeout (float, optional):    Seconds the breaker stays open before a
+                                                trial call. Defaults to 60.
+        """
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Tells whether the provider may be called now.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Half-open: let this call through and hold the others back
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """
+        Closes the breaker after a successful call.
+        """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        """
+        Counts a failed call, opening the breaker when the limit is reached.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    log.warning(f"⚠️ {self.name} failed {self._failures} times in a row. Pausing calls for {self.reset_timeout}s.")
+                self._opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        """
+        Returns the breaker to its initial closed state.
+        """
+        self.record_success()
+
+_hf_breaker = CircuitBreaker("Hugging Face")
+_replicate_breaker = CircuitBreaker("Replicate")
+_unsplash_breaker = CircuitBreaker("Unsplash")
+_pexels_breaker = CircuitBreaker("Pexels")
+
+# Bulkheads: maximum concurrent calls per provider across all sessions, so a
+# backlog on the slow generators never takes capacity from the stock APIs
+_hf_slots = threading.BoundedSemaphore(2)
+_replicate_slots = threading.BoundedSemaphore(4)
+_unsplash_slots = threading.BoundedSemaphore(16)
+_pexels_slots = threading.BoundedSemaphore(16)
+
+# How long a call waits for a provider slot before giving up on that provider
+BULKHEAD_WAIT = 1
+
+def _take_slot(slots: threading.BoundedSemaphore, name: str) -> bool:
+    """
+    Takes a provider slot, giving up after `BULKHEAD_WAIT` seconds.
+
+    Callers that do not get one fall back (placeholder or next provider)
+    instead of queueing behind a saturated provider.
+
+    Returns:
+        bool: True if a slot was taken; the caller must release it.
+    """
+    if slots.acquire(timeout=BULKHEAD_WAIT):
+        return True
+    log.warning(f"⚠️ {name} is saturated, no free slot after {BULKHEAD_WAIT}s. Skipping.")
+    return False
+
+def _bulkhead(slots: threading.BoundedSemaphore, name: str):
+    """
+    Runs the decorated provider function in one of its slots, or returns
+    None when none frees up in time.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _take_slot(slots, name):
+                return None
+            try:
+                return func(*args, **kwargs)
+            finally:
+                slots.release()
+        return wrapper
+    return decorator
+
+# Common Spanish to English translations for better photo results
+_TOPIC_TRANSLATIONS = {
+    # Science/Space
+    'agujeros negros': 'black hole space galaxy',
+    'drones': 'drone aerial technology',
+    'inteligencia artificial': 'artificial intelligence technology',
+    'robótica': 'robot robotics technology',
+    'cambio climático': 'climate change environment',
+    'energía solar': 'solar energy panels',
+    'océanos': 'ocean sea water',
+    'montañas': 'mountain landscape nature',
+    'tecnología': 'technology innovation',
+    'ciencia': 'science laboratory research',
+    'medicina': 'medicine healthcare hospital',
+    'astronomía': 'astronomy space stars',
+    'física': 'physics science',
+    'química': 'chemistry laboratory',
+    'biología': 'biology nature',
+    'computación': 'computer technology',
+    # Add more as needed
+}
+
+_ACCENT_TABLE = str.maketrans('íáéóú', 'iaeou')
+
+# Instruction markers LLMs sometimes echo into the image prompt
+_PROMPT_MARKERS = [
+    '[inst]', '[/inst]', '<<sys>>', '<</sys>>', 
+    'task:', 'image prompt:', 'prompt:', 'create', 'generate',
+    'english only', 'mandatory', 'output', 'here'
+]
+
+# Extended stop words to filter out of stock-photo searches
+_STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'with', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'is', 'are',
+    'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'can', 'may', 'might', 'must', 'shall',
+    'this', 'that', 'these', 'those', 'here', 'there', 'where', 'when', 'what', 'which', 'your',
+    'photorealistic', 'cinematic', 'lighting', 'professional', 'photography', 'photographer',
+    '8k', '4k', 'uhd', 'hd', 'high', 'resolution', 'detailed', 'image', 'picture', 'photo',
+    'quality', 'render', 'rendered', 'shot', 'view', 'scene', 'background', 'style', 'aesthetic',
+    'beautiful', 'stunning', 'amazing', 'incredible', 'highly', 'ultra', 'hyper', 'super',
+    'realistic', 'real', 'life', 'lifelike', 'must', 'exclusively', 'only', 'text', 'words',
+    'minimize', 'maximum', 'include', 'not'
+})
+
+# Punctuation and special characters, mapped to spaces in a single pass
+_PUNCTUATION_TABLE = str.maketrans(dict.fromkeys(',.:;!?()[]{}\'"`<>/-=+*&%$#@~|\\^', ' '))
+
 def translate_to_english_keywords(topic: str) -> str:
     """
     Translates Spanish topics to English keywords optimized for stock photo search.
@@ -35,42 +244,21 @@ def translate_to_english_keywords(topic: str) -> str:
     Returns:
         str: English keywords suitable for Pexels/Unsplash search.
     """
-    # Common Spanish to English translations for better photo results
-    translations = {
-        # Science/Space
-        'agujeros negros': 'black hole space galaxy',
-        'drones': 'drone aerial technology',
-        'inteligencia artificial': 'artificial intelligence technology',
-        'robótica': 'robot robotics technology',
-        'cambio climático': 'climate change environment',
-        'energía solar': 'solar energy panels',
-        'océanos': 'ocean sea water',
-        'montañas': 'mountain landscape nature',
-        'tecnología': 'technology innovation',
-        'ciencia': 'science laboratory research',
-        'medicina': 'medicine healthcare hospital',
-        'astronomía': 'astronomy space stars',
-        'física': 'physics science',
-        'química': 'chemistry laboratory',
-        'biología': 'biology nature',
-        'computación': 'computer technology',
-        # Add more as needed
-    }
-    
     topic_lower = topic.lower().strip()
     
     # Check for exact matches
-    if topic_lower in translations:
-        return translations[topic_lower]
+    if topic_lower in _TOPIC_TRANSLATIONS:
+        return _TOPIC_TRANSLATIONS[topic_lower]
     
     # Check for partial matches
-    for spanish, english in translations.items():
+    for spanish, english in _TOPIC_TRANSLATIONS.items():
         if spanish in topic_lower:
             return english
     
     # If no translation found, return cleaned topic
-    return topic_lower.replace('í', 'i').replace('á', 'a').replace('é', 'e').replace('ó', 'o').replace('ú', 'u')
+    return topic_lower.translate(_ACCENT_TABLE)
 
+@lru_cache(maxsize=1024)
 def extract_keywords(prompt: str, max_words: int = 3) -> str:
     """
     Extracts the most relevant keywords from an image prompt.
@@ -94,53 +282,31 @@ def extract_keywords(prompt: str, max_words: int = 3) -> str:
     prompt_clean = prompt.lower()
     
     # Remove common instruction patterns from LLM prompts
-    markers_to_remove = [
-        '[inst]', '[/inst]', '<<sys>>', '<</sys>>', 
-        'task:', 'image prompt:', 'prompt:', 'create', 'generate',
-        'english only', 'mandatory', 'output', 'here'
-    ]
-    for marker in markers_to_remove:
+    for marker in _PROMPT_MARKERS:
         prompt_clean = prompt_clean.replace(marker, ' ')
     
-    # Extended stop words to filter out
-    stop_words = {
-        'a', 'an', 'the', 'with', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'is', 'are',
-        'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-        'would', 'could', 'should', 'can', 'may', 'might', 'must', 'shall',
-        'this', 'that', 'these', 'those', 'here', 'there', 'where', 'when', 'what', 'which', 'your',
-        'photorealistic', 'cinematic', 'lighting', 'professional', 'photography', 'photographer',
-        '8k', '4k', 'uhd', 'hd', 'high', 'resolution', 'detailed', 'image', 'picture', 'photo',
-        'quality', 'render', 'rendered', 'shot', 'view', 'scene', 'background', 'style', 'aesthetic',
-        'beautiful', 'stunning', 'amazing', 'incredible', 'highly', 'ultra', 'hyper', 'super',
-        'realistic', 'real', 'life', 'lifelike', 'must', 'exclusively', 'only', 'text', 'words',
-        'minimize', 'maximum', 'include', 'not'
-    }
-    
     # Clean and tokenize - remove all punctuation and special characters
-    for char in ',.:;!?()[]{}\'"\'`<>/-=+*&%$#@~|\\^':
-        prompt_clean = prompt_clean.replace(char, ' ')
+    prompt_clean = prompt_clean.translate(_PUNCTUATION_TABLE)
     
     words = prompt_clean.split()
     
     # Filter: only alphabetic words, 4+ chars, not in stop words
-    keywords = [w for w in words if w not in stop_words and len(w) >= 4 and w.isalpha()]
+    keywords = [w for w in words if w not in _STOP_WORDS and len(w) >= 4 and w.isalpha()]
     
     # If we got too few keywords, be less restrictive
     if len(keywords) < 2:
-        keywords = [w for w in words if w not in stop_words and len(w) > 2 and w.isalpha()]
+        keywords = [w for w in words if w not in _STOP_WORDS and len(w) > 2 and w.isalpha()]
     
     # Remove duplicates while preserving order
-    seen = set()
-    unique_keywords = []
-    for word in keywords:
-        if word not in seen:
-            seen.add(word)
-            unique_keywords.append(word)
+    unique_keywords = list(dict.fromkeys(keywords))
     
     # Return top keywords - fewer is better for precision
     result = ' '.join(unique_keywords[:max_words])
     return result if result else 'technology modern'  # Better fallback
 
+# The placeholder never changes, so it is built once instead of on every fallback
+_PLACEHOLDER_IMAGE = Image.new('RGB', (640, 480), color = (73, 109, 137))
+
 def create_placeholder_image(text_input: str) -> Image.Image:
     """
     Creates a solid color placeholder image.
@@ -151,69 +317,334 @@ def create_placeholder_image(text_input: str) -> Image.Image:
                             is kept for API consistency.
 
     Returns:
-        Image.Image: A PIL Image object representing the placeholder.
+        Image.Image:    A PIL Image object representing the placeholder. The
+                        same instance is returned on every call, so callers
+                        must copy it before drawing on it.
     """
-    W, H = 640, 480
-    img = Image.new('RGB', (W, H), color = (73, 109, 137))
-    return img
+    return _PLACEHOLDER_IMAGE
 
-def generate_image_from_huggingface(prompt: str) -> Image.Image | None:
+@lru_cache(maxsize=1)
+def _get_hf_client() -> InferenceClient:
     """
-    Generates an image from a text prompt using the Hugging Face Inference API.
+    Returns the shared Hugging Face inference client, creating it on first use.
 
-    It attempts to generate an image up to MAX_RETRIES times. If the model is
-    loading, it will wait and retry. If other errors occur, or all retries fail,
-    it returns a placeholder image.
+    Reusing one client keeps its HTTP connection pool alive between images.
+    """
+    return InferenceClient(token=HF_TOKEN, timeout=HF_TIMEOUT)
+
+@lru_cache(maxsize=1)
+def _get_replicate_client() -> replicate.Client:
+    """
+    Returns the shared Replicate client, creating it on first use.
+    """
+    return replicate.Client(api_token=REPLICATE_API_TOKEN)
+
+def warm_up_clients() -> None:
+    """
+    Creates the clients of the configured image providers ahead of time.
+
+    Meant to run once at app start, so the first image request does not pay
+    for client setup.
+    """
+    if HF_TOKEN:
+        _get_hf_client()
+    if REPLICATE_API_TOKEN:
+        _get_replicate_client()
+
+def to_webp_bytes(image: Image.Image, quality: int = 80) -> bytes:
+    """
+    Encodes an image as WebP for display or transport.
+
+    A 1024x1024 render is several times smaller as WebP than as the PNG that
+    Streamlit would otherwise encode, so the page loads faster.
+
+    Args:
+        image (Image.Image): The image to encode.
+        quality (int, optional): WebP quality (0-100). Defaults to 80.
+
+    Returns:
+        bytes: The encoded WebP image.
+    """
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+def _image_cache_key(provider: str, model: str | None, prompt: str) -> str:
+    """
+    Builds the on-disk cache key of a generated image.
+
+    The prompt is lowercased and its whitespace collapsed first: the CLIP text
+    encoders behind these models do the same, so such variants render alike.
+    Word order is kept, since it changes the meaning of the prompt.
+    """
+    normalized = " ".join(prompt.lower().split())
+    return blake2b(f"{provider}|{model}|{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+def _cached_image_path(key: str) -> Path | None:
+    """
+    Finds a cached image, marking it as recently used.
+
+    Args:
+        key (str): The cache key from `_image_cache_key`.
+
+    Returns:
+        Path | None: The cached file, or None on a miss or when the cache is disabled.
+    """
+    if not IMAGE_CACHE_ENABLED:
+        return None
+
+    path = Path(IMAGE_CACHE_DIR) / f"{key}.webp"
+    try:
+        os.utime(path)  # The modification time doubles as the LRU timestamp
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        # A read-only volume only costs LRU accuracy, the image is still there
+        log.debug(f"Could not refresh the cached image timestamp: {e}")
+    return path
+
+def _load_cached_image(key: str) -> bytes | None:
+    """
+    Reads a cached image, marking it as recently used.
+
+    Args:
+        key (str): The cache key from `_image_cache_key`.
+
+    Returns:
+        bytes | None: The encoded image, or None on a miss or when the cache is disabled.
+    """
+    path = _cached_image_path(key)
+    if path is None:
+        return None
+    try:
+        data = path.read_bytes()
+    except OSError:
+        # Evicted between the lookup and the read
+        return None
+
+    log.info("✅ Image served from the local cache.")
+    return data
+
+def _evict_least_recently_used(directory: Path, limit_mb: int) -> None:
+    """
+    Deletes the oldest WebP files of a directory until it fits in `limit_mb`.
+
+    The modification time is the LRU timestamp: files are touched on reads.
+    """
+    entries = sorted(
+        ((entry.stat(), entry) for entry in directory.glob("*.webp")),
+        key=lambda item: item[0].st_mtime
+    )
+    total = sum(stat.st_size for stat, _ in entries)
+    limit = limit_mb * 1024 * 1024
+    for stat, entry in entries:
+        if total <= limit:
+            break
+        entry.unlink(missing_ok=True)
+        total -= stat.st_size
+
+def _store_cached_image(key: str, data: bytes) -> None:
+    """
+    Writes an image to the cache, evicting the least recently used ones over the size limit.
+
+    Args:
+        key (str): The cache key from `_image_cache_key`.
+        data (bytes): The encoded image.
+    """
+    if not IMAGE_CACHE_ENABLED:
+        return
+
+    try:
+        cache_dir = Path(IMAGE_CACHE_DIR)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (cache_dir / f"{key}.webp").write_bytes(data)
+        _evict_least_recently_used(cache_dir, IMAGE_CACHE_SIZE_MB)
+    except OSError as e:
+        log.warning(f"⚠️ Could not write to the image cache: {e}")
+
+def _save_generated_image(chunks: Iterable[bytes]) -> str:
+    """
+    Writes an image under a name derived from its content.
+
+    Concurrent requests never overwrite each other's file, and identical
+    images share one immutable path. The directory is kept under
+    `GENERATED_IMAGES_SIZE_MB` by deleting the oldest images.
+
+    Args:
+        chunks (Iterable[bytes]): The encoded WebP image, possibly in pieces.
+
+    Returns:
+        str: The path of the stored image.
+    """
+    output_dir = Path(GENERATED_IMAGES_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = sha256()
+    tmp = tempfile.NamedTemporaryFile(dir=output_dir, suffix=".part", delete=False)
+    try:
+        with tmp:
+            for chunk in chunks:
+                digest.update(chunk)
+                tmp.write(chunk)
+        image_path = output_dir / f"{digest.hexdigest()[:16]}.webp"
+        os.replace(tmp.name, image_path)
+    except Exception:
+        # A failed download must not leave its partial file behind
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+    try:
+        _evict_least_recently_used(output_dir, GENERATED_IMAGES_SIZE_MB)
+    except OSError as e:
+        log.warning(f"⚠️ Could not trim {GENERATED_IMAGES_DIR}: {e}")
+    return str(image_path)
+
+def _render_with_huggingface(prompt: str) -> Image.Image | None:
+    """
+    Calls the Hugging Face Inference API, retrying while the model loads.
 
     Args:
         prompt (str): The text prompt to generate the image from.
 
     Returns:
-        Image.Image | None: A PIL Image object of the generated image, or a
-                            placeholder image if generation fails.
+        Image.Image | None: The generated image, or None if generation fails.
     """
-    client = InferenceClient(token=HF_TOKEN)
+    if not _hf_breaker.allow():
+        log.warning("⚠️ Hugging Face circuit open. Using Mockup.")
+        return None
+
+    client = _get_hf_client()
 
-    MAX_RETRIES = 2
+    MAX_RETRIES = 5
     for attempt in range(MAX_RETRIES):
         try:
             log.info(f"⏳ Trying to create an image with HF. (Try {attempt + 1})...")
             
-            generated_image = client.text_to_image(
-                model=HF_MODEL,
-                prompt=prompt,
-                num_inference_steps=60,
-                negative_prompt="bad quality, low resolution, blurry, distorted, ugly",
-                guidance_scale=8.5,      # Add this for better prompt adherence
-                width=1024,
-                height=1024
-            )
+            if not _take_slot(_hf_slots, "Hugging Face"):
+                return None
+            try:
+                generated_image = client.text_to_image(
+                    model=HF_MODEL,
+                    prompt=prompt,
+                    num_inference_steps=HF_INFERENCE_STEPS,
+                    negative_prompt="bad quality, low resolution, blurry, distorted, ugly",
+                    guidance_scale=8.5,      # Add this for better prompt adherence
+                    width=HF_IMAGE_SIZE[0],
+                    height=HF_IMAGE_SIZE[1]
+                )
+            finally:
+                _hf_slots.release()
             
             log.info("✅ Image generated successfully (Hugging Face Hub).")
+            _hf_breaker.record_success()
             return generated_image
             
 
         except RepositoryNotFoundError:
             log.error(f"❌ Error: Model '{HF_MODEL}' not found or not accessible with this token.")
             break
-        except Exception as e:
-            error_message = str(e).lower()
-            
-            if "not ready" in error_message or "loading" in error_message:
-                wait_time = 15
-                log.info(f"⏳ Model loading in HF. Retrying in {wait_time} seconds...")
+        except requests.exceptions.ConnectionError as e:
+            # Dropped or refused connections are usually transient: retry almost at once
+            if attempt == MAX_RETRIES - 1:
+                break
+            wait_time = random.uniform(0.1, 0.5)
+            log.warning(f"⚠️ Connection error with HF ({e}). Retrying in {wait_time:.1f} seconds...")
+            time.sleep(wait_time)
+            continue
+        except BadRequestError as e:
+            # The prompt itself is invalid: retrying cannot help, and HF did
+            # answer, so a bad prompt must not count towards opening the breaker
+            log.error(f"❌ Request rejected by HF: {e}")
+            _hf_breaker.record_success()
+            return None
+        except InferenceTimeoutError as e:
+            # Each attempt may already have waited HF_TIMEOUT seconds holding
+            # one of the `_hf_slots`; retrying would starve other requests
+            log.error(f"❌ HF request timed out: {e}")
+            break
+        except HfHubHTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+
+            if status == 503:
+                if attempt == MAX_RETRIES - 1:
+                    break
+                # Exponential backoff (2, 4, 8, 15s) with jitter: a model that
+                # wakes quickly is retried soon, a cold one still gets time
+                wait_time = min(2 ** (attempt + 1), 15) + random.uniform(0, 1)
+                log.info(f"⏳ Model loading in HF. Retrying in {wait_time:.1f} seconds...")
                 time.sleep(wait_time)
-                continue 
-            
-            if "rate limit" in error_message or "limit exceeded" in error_message:
+                continue
+
+            if status == 429:
                 log.error("❌ Free limit reached. Using Mockup.")
                 break
-                
+
+            log.error(f"❌ HTTP error {status} in HF: {e}")
+            break
+        except Exception as e:
             log.error(f"❌ Unknown error in HF: {e}")
             break
         
+    _hf_breaker.record_failure()
     log.info("⚠️ All try attempts failed. Using Mockup")
-    return create_placeholder_image(prompt)
+    return None
+
+def generate_image_from_huggingface(prompt: str) -> Image.Image:
+    """
+    Generates an image from a text prompt using the Hugging Face Inference API.
+
+    It attempts to generate an image up to MAX_RETRIES times. If the model is
+    loading, it will wait and retry. If other errors occur, or all retries fail,
+    it returns a placeholder image.
+
+    When the image cache is enabled, a prompt that was already rendered with
+    the same model is served from disk without calling the API.
+
+    Args:
+        prompt (str): The text prompt to generate the image from.
+
+    Returns:
+        Image.Image:    A PIL Image object of the generated image, or a
+                        placeholder image if generation fails.
+    """
+    cache_key = _image_cache_key("huggingface", HF_MODEL, prompt)
+    cached = _load_cached_image(cache_key)
+    if cached is not None:
+        return Image.open(BytesIO(cached))
+
+    generated_image = _render_with_huggingface(prompt)
+    if generated_image is None:
+        return create_placeholder_image(prompt)
+    if IMAGE_CACHE_ENABLED:
+        # Only encode when the bytes will actually be stored
+        _store_cached_image(cache_key, to_webp_bytes(generated_image, quality=CACHED_WEBP_QUALITY))
+    return generated_image
+
+def generate_image_bytes_from_huggingface(prompt: str) -> bytes | None:
+    """
+    Generates an image with Hugging Face and returns it encoded as WebP.
+
+    For callers that only display or store the image: a cache hit is returned
+    as-is, without decoding it into a PIL image and encoding it again.
+
+    Args:
+        prompt (str): The text prompt to generate the image from.
+
+    Returns:
+        bytes | None: The WebP-encoded image, or None if generation fails.
+    """
+    cache_key = _image_cache_key("huggingface", HF_MODEL, prompt)
+    cached = _load_cached_image(cache_key)
+    if cached is not None:
+        return cached
+
+    generated_image = _render_with_huggingface(prompt)
+    if generated_image is None:
+        return None
+    # Always encoded here: the WebP bytes are this function's result
+    data = to_webp_bytes(generated_image, quality=CACHED_WEBP_QUALITY)
+    _store_cached_image(cache_key, data)
+    return data
 
 def generate_image_from_replicate(prompt: str) -> str | None:
     """
@@ -221,41 +652,65 @@ def generate_image_from_replicate(prompt: str) -> str | None:
 
     This function sends a prompt to the Replicate API to generate an image.
     If the image is generated successfully, it is downloaded and saved to a
-    local file.
+    content-addressed file in `GENERATED_IMAGES_DIR`.
+    With the image cache enabled, a repeated prompt returns the path of the
+    cached file in `IMAGE_CACHE_DIR` directly.
 
     Args:
         prompt (str): The text prompt to generate the image from.
 
     Returns:
         str | None: The file path of the generated image (e.g.,
-                    'generated_content.webp') if successful, otherwise None.
+                    'generated_images/3f2a9c0d1e4b5a6f.webp') if successful,
+                    otherwise None.
     """
+    cache_key = _image_cache_key("replicate", REPLICATE_MODEL, prompt)
+    cached_path = _cached_image_path(cache_key)
+    if cached_path is not None:
+        # Cache entries are immutable files already, no need to copy them out
+        log.info("✅ Image served from the local cache.")
+        return str(cached_path)
+
+    if not _replicate_breaker.allow():
+        log.warning("⚠️ Replicate circuit open. Skipping.")
+        return None
+
     try:
-        output = replicate.run(
-            REPLICATE_MODEL,
-            input={
-                "prompt": prompt,
-                "aspect_ratio": "16:9",
-                "output_format": "webp",
-                "output_quality": 90
-            }
-        )
+        if not _take_slot(_replicate_slots, "Replicate"):
+            return None
+        try:
+            output = _get_replicate_client().run(
+                REPLICATE_MODEL,
+                input={
+                    "prompt": prompt,
+                    "aspect_ratio": "16:9",
+                    "output_format": "webp",
+                    "output_quality": 90
+                }
+            )
+        finally:
+            _replicate_slots.release()
 
         image_url = output[0]
         
-        response = requests.get(image_url)
-        if response.status_code == 200:
-            image_path = "generated_content.webp"
-            with open(image_path, "wb") as f:
-                f.write(response.content)
-            return image_path
+        # Stream the file to disk in chunks instead of buffering it all in memory
+        with _http_session.get(image_url, stream=True, timeout=HTTP_TIMEOUT) as response:
+            if response.status_code == 200:
+                image_path = _save_generated_image(response.iter_content(chunk_size=64 * 1024))
+                _replicate_breaker.record_success()
+                if IMAGE_CACHE_ENABLED:
+                    _store_cached_image(cache_key, Path(image_path).read_bytes())
+                return image_path
             
+        _replicate_breaker.record_failure()
         return None
 
     except Exception as e:
         log.error(f"Error con Replicate: {e}")
+        _replicate_breaker.record_failure()
         return None
 
+@_bulkhead(_unsplash_slots, "Unsplash")
 def search_image_from_unsplash(prompt: str) -> Image.Image | None:
     """
     Searches for a high-quality stock photo on Unsplash based on the prompt.
@@ -278,6 +733,10 @@ def search_image_from_unsplash(prompt: str) -> Image.Image | None:
         log.error("❌ UNSPLASH_ACCESS_KEY not configured")
         return None
     
+    if not _unsplash_breaker.allow():
+        log.warning("⚠️ Unsplash circuit open. Skipping.")
+        return None
+    
     try:
         # Translate topic to English keywords optimized for photo search
         keywords = translate_to_english_keywords(prompt)
@@ -293,7 +752,14 @@ def search_image_from_unsplash(prompt: str) -> Image.Image | None:
             "count": 1  # Force randomness
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = _http_session.get(url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
+        
+        # Any answer but a rate limit or a server error means Unsplash is up,
+        # so a half-open breaker always gets an outcome from this call
+        if response.status_code == 429 or response.status_code >= 500:
+            _unsplash_breaker.record_failure()
+        else:
+            _unsplash_breaker.record_success()
         
         if response.status_code == 200:
             data = response.json()
@@ -303,7 +769,7 @@ def search_image_from_unsplash(prompt: str) -> Image.Image | None:
             photographer = photo_data['user']['name']
             
             # Download the image
-            img_response = requests.get(image_url, timeout=30)
+            img_response = _http_session.get(image_url, timeout=HTTP_TIMEOUT)
             if img_response.status_code == 200:
                 image = Image.open(BytesIO(img_response.content))
                 log.info(f"✅ Image found on Unsplash (by {photographer})")
@@ -326,14 +792,18 @@ def search_image_from_unsplash(prompt: str) -> Image.Image | None:
             
     except requests.exceptions.Timeout:
         log.error("❌ Unsplash request timed out")
+        _unsplash_breaker.record_failure()
         return None
     except requests.exceptions.RequestException as e:
         log.error(f"❌ Network error with Unsplash: {e}")
+        _unsplash_breaker.record_failure()
         return None
     except Exception as e:
         log.error(f"❌ Unexpected error searching Unsplash: {type(e).__name__}: {e}")
+        _unsplash_breaker.record_failure()
         return None
 
+@_bulkhead(_pexels_slots, "Pexels")
 def search_image_from_pexels(prompt: str) -> Image.Image | None:
     """
     Searches for a high-quality stock photo on Pexels based on the prompt.
@@ -356,6 +826,10 @@ def search_image_from_pexels(prompt: str) -> Image.Image | None:
         log.error("❌ PEXELS_API_KEY not configured")
         return None
     
+    if not _pexels_breaker.allow():
+        log.warning("⚠️ Pexels circuit open. Skipping.")
+        return None
+    
     try:
         # Translate topic to English keywords optimized for photo search
         keywords = translate_to_english_keywords(prompt)
@@ -375,7 +849,14 @@ def search_image_from_pexels(prompt: str) -> Image.Image | None:
         }
         
         # Search for photos
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = _http_session.get(url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
+        
+        # Any answer but a rate limit or a server error means Pexels is up,
+        # so a half-open breaker always gets an outcome from this call
+        if response.status_code == 429 or response.status_code >= 500:
+            _pexels_breaker.record_failure()
+        else:
+            _pexels_breaker.record_success()
         
         if response.status_code == 200:
             data = response.json()
@@ -387,7 +868,7 @@ def search_image_from_pexels(prompt: str) -> Image.Image | None:
                 photographer = photo['photographer']
                 
                 # Download the image
-                img_response = requests.get(image_url, timeout=30)
+                img_response = _http_session.get(image_url, timeout=HTTP_TIMEOUT)
                 if img_response.status_code == 200:
                     image = Image.open(BytesIO(img_response.content))
                     log.info(f"✅ Image found on Pexels (by {photographer})")
@@ -402,13 +883,13 @@ def search_image_from_pexels(prompt: str) -> Image.Image | None:
                     log.info("🔄 Retrying with first keyword only...")
                     simple_keyword = keywords.split()[0]
                     params["query"] = simple_keyword
-                    response = requests.get(url, headers=headers, params=params, timeout=30)
+                    response = _http_session.get(url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
                     if response.status_code == 200:
                         data = response.json()
                         if data.get('photos') and len(data['photos']) > 0:
                             photo = data['photos'][0]
                             image_url = photo['src']['large2x']
-                            img_response = requests.get(image_url, timeout=30)
+                            img_response = _http_session.get(image_url, timeout=HTTP_TIMEOUT)
                             if img_response.status_code == 200:
                                 image = Image.open(BytesIO(img_response.content))
                                 log.info(f"✅ Image found on Pexels with simpler search: '{simple_keyword}'")
@@ -426,10 +907,13 @@ def search_image_from_pexels(prompt: str) -> Image.Image | None:
             
     except requests.exceptions.Timeout:
         log.error("❌ Pexels request timed out")
+        _pexels_breaker.record_failure()
         return None
     except requests.exceptions.RequestException as e:
         log.error(f"❌ Network error with Pexels: {e}")
+        _pexels_breaker.record_failure()
         return None
     except Exception as e:
         log.error(f"❌ Unexpected error searching Pexels: {type(e).__name__}: {e}")
+        _pexels_breaker.record_failure()
         return None
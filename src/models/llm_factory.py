@@ -5,25 +5,30 @@ It supports creating models from different providers such as Ollama (local),
 Groq (cloud), and Google Gemini (cloud). The main function `get_llm` allows
 selecting the desired language model provider based on a string identifier.
 """
-from langchain_ollama import OllamaLLM
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.language_models import BaseChatModel
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from src.core.logger.logger import Logger
 from src.core.logger.log_setup import log_setup
 from config.settings import GROQ_API_KEY, GROQ_MODEL, GEMINI_API_KEY, GEMINI_MODEL
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
 log_setup()
 log = Logger().log
 
-def get_llm_ollama(model_name: str = "mistral") -> BaseChatModel:
+def get_llm_ollama(model_name: str = "mistral", max_tokens: int | None = None) -> BaseChatModel:
     """
     Initializes and returns a local Ollama language model.
 
     Args:
         model_name (str, optional): The name of the Ollama model to use.
                                     Defaults to "mistral".
+        max_tokens (int | None, optional):  Maximum number of tokens to generate.
+                                            Defaults to None (model default).
 
     Returns:
         An instance of the Ollama language model.
@@ -32,21 +37,28 @@ def get_llm_ollama(model_name: str = "mistral") -> BaseChatModel:
         Exception: If there is an error initializing the language model.
     """
     try:
+        # Provider SDKs are imported on first use so unused providers cost nothing
+        from langchain_ollama import OllamaLLM
+
         # Note: By default Ollama can be found in http://localhost:11434
-        llm = OllamaLLM(model=model_name, temperature=0.3)
+        llm = OllamaLLM(model=model_name, temperature=0.3, num_predict=max_tokens)
         log.info(f"✅ LLM local '{model_name}' successfully initialized.")
         return llm
     except Exception as e:
         log.error(f"❌ Error initializing LLM local '{model_name}': {e}")
         raise e
     
-def get_llm_groq() -> BaseChatModel:
+def get_llm_groq(max_tokens: int | None = None) -> BaseChatModel:
     """
     Initializes and returns a Groq language model.
 
     This function retrieves the Groq API key and model name from the application
     settings. It raises a `ValueError` if the API key is not configured.
 
+    Args:
+        max_tokens (int | None, optional):  Maximum number of tokens to generate.
+                                            Defaults to None (no limit).
+
     Returns:
         An instance of the `ChatGroq` language model.
 
@@ -60,13 +72,15 @@ def get_llm_groq() -> BaseChatModel:
         if not api_key:
             raise ValueError("Groq API Key is not set. Please set the GROQ_API_KEY environment variable.")
         
+        from langchain_groq import ChatGroq
+
         llm = ChatGroq(
             api_key=api_key,
             model_name=model_name,
             temperature=0.1,             # Lower temperature (0.0 - 0.3) reduces "rambling"
-            max_retries=5,               # Groq rate limits are brief; more retries help
-            timeout=30,                  # Groq is fast; if it takes >30s, something is wrong
-            max_tokens=None,             # Set a limit if you want to cap usage/costs
+            max_retries=2,               # SDK retries back off with jitter; 3 attempts bound the worst case
+            timeout=20,                  # Groq is fast; if it takes >20s, something is wrong
+            max_tokens=max_tokens,       # Set a limit if you want to cap usage/costs
         )
         log.info(f"✅ LLM '{model_name}' (Groq) successfully initialized.")
         return llm
@@ -75,13 +89,17 @@ def get_llm_groq() -> BaseChatModel:
         log.error(f"⚠️ Error initializing LLM basado en API '{model_name}' (Groq): {e}.")
         raise e
 
-def get_llm_gemini() -> BaseChatModel:
+def get_llm_gemini(max_tokens: int = 500) -> BaseChatModel:
     """
     Initializes and returns a Google Gemini language model.
 
     This function retrieves the Gemini API key and model name from the application
     settings. It raises a `ValueError` if the API key is not configured.
 
+    Args:
+        max_tokens (int, optional): Maximum number of tokens to generate.
+                                    Defaults to 500.
+
     Returns:
         An instance of the `ChatGoogleGenerativeAI` language model.
 
@@ -96,13 +114,15 @@ def get_llm_gemini() -> BaseChatModel:
         raise ValueError("Gemini API Key is not set. Please set the GEMINI_API_KEY environment variable.")
     
     try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         llm = ChatGoogleGenerativeAI(
             model=model_name,
             api_key=api_key,
             temperature=0.1,          # Lower temperature (0.0 - 0.3) reduces "rambling"
-            max_output_tokens=500,    # Strictly limit output size to save time/cost
-            max_retries=5,            # Avoid long waits on transient API failures
-            timeout=60,               # Set a hard cutoff to prevent hanging
+            max_output_tokens=max_tokens,  # Strictly limit output size to save time/cost
+            max_retries=2,            # Avoid long waits on transient API failures
+            timeout=30,               # Per attempt, so an outage costs at most ~90s
         )
         log.info(f"✅ LLM  '{model_name}' (Gemini) successfully initialized.")
         return llm
@@ -110,13 +130,19 @@ def get_llm_gemini() -> BaseChatModel:
         log.error(f"❌ Error initializing LLM '{model_name}' (Gemini): {e}")
         raise e
     
-def get_llm(llm_choice: str) -> BaseChatModel:
+@lru_cache(maxsize=8)
+def get_llm(llm_choice: str, max_tokens: int | None = None) -> BaseChatModel:
     """
     Factory function to get a language model instance based on the provider choice.
 
+    Instances are memoized per (provider, max_tokens), so rebuilding chains on
+    every request reuses the same client and its HTTP connection pool.
+
     Args:
         llm_choice (str):   The desired language model provider.
                             Supported values are "Gemini", "Groq", "Ollama".
+        max_tokens (int | None, optional):  Maximum number of tokens to generate.
+                                            Defaults to None (provider default).
 
     Returns:
         An instance of the selected language model.
@@ -125,23 +151,36 @@ def get_llm(llm_choice: str) -> BaseChatModel:
         RuntimeError: If the selected language model fails to initialize.
         ValueError: If the `llm_choice` is not a recognized provider.
     """
-    if llm_choice == "Gemini":
-        try:
-            return get_llm_gemini()
-        except Exception as e:
-            raise RuntimeError(f"Error initialing Gemini. Revise settings.py. Error: {e}")
+    # Resolved at call time so the provider functions can be patched in tests
+    factories = {
+        "Gemini": get_llm_gemini,
+        "Groq": get_llm_groq,
+        "Ollama": get_llm_ollama,
+    }
+    factory = factories.get(llm_choice)
+    if factory is None:
+        raise ValueError(f"LLM option not recognized: {llm_choice}")
+
+    kwargs = {} if max_tokens is None else {"max_tokens": max_tokens}
+    try:
+        return factory(**kwargs)
+    except Exception as e:
+        raise RuntimeError(f"Error initialing {llm_choice}. Revise settings.py. Error: {e}") from e
 
-    elif llm_choice == "Groq":
-        try:
-            return get_llm_groq()
-        except Exception as e:
-            raise RuntimeError(f"Error initialing Groq. Revise settings.py. Error: {e}")
+def warm_up_llms(providers: tuple[str, ...] = ("Gemini", "Groq", "Ollama")) -> None:
+    """
+    Initializes the given providers into the `get_llm` cache ahead of time.
+
+    Meant to run once at app start, so the first request does not pay for
+    importing the provider SDK and building its client. Providers that are not
+    configured are skipped.
 
-    elif llm_choice == "Ollama":
+    Args:
+        providers (tuple[str, ...], optional):  The providers to initialize.
+                                                Defaults to all supported ones.
+    """
+    for provider in providers:
         try:
-            return get_llm_ollama()
+            get_llm(provider)
         except Exception as e:
-            raise RuntimeError(f"Error initialing Ollama. Revise settings.py. Error: {e}")
-            
-    else:
-        raise ValueError(f"LLM option not recognized: {llm_choice}")
\ No newline at end of file
+            log.debug(f"Skipping warm-up of {provider}: {e}")
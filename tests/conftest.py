@@ -0,0 +1,21 @@
+import socket
+import pytest
+
+@pytest.fixture(autouse=True, scope="session")
+def no_network():
+    """
+    Fails any test that tries to open a real network connection.
+
+    Every provider call is expected to be mocked; an unmocked one would
+    otherwise hang on DNS/TCP until its timeout instead of failing at once.
+    """
+    original_connect = socket.socket.connect
+    
+    def guarded_connect(sock, address):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            raise RuntimeError(f"Network access is disabled in tests: {address}")
+        return original_connect(sock, address)
+    
+    socket.socket.connect = guarded_connect
+    yield
+    socket.socket.connect = original_connect
@@ -1,11 +1,19 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.documents import Document
 from langchain_core.runnables import RunnableSequence
 from src.core.content_chains import (
     create_chain, 
     create_blog_chain, 
     create_twitter_adaptor_chain,
-    create_image_prompt_chain
+    ainvoke_all,
+    SemanticCachedChain,
+    create_image_prompt_chain,
+    TWITTER_MAX_TOKENS,
+    TWITTER_STOP,
+    IMAGE_PROMPT_MAX_TOKENS,
+    IMAGE_PROMPT_STOP
 )
 
 def test_create_chain():
@@ -16,6 +24,28 @@ def test_create_chain():
     # Check if it's a Runnable (LangChain pipe)
     assert isinstance(chain, RunnableSequence)
 
+def test_create_chain_with_system_prompt():
+    chain = create_chain(MagicMock(), ("You write in {target_language}.", "Topic: {topic}"))
+    
+    messages = chain.first.format_messages(target_language="English", topic="AI")
+    assert [m.type for m in messages] == ["system", "human"]
+    assert messages[0].content == "You write in English."
+
+def test_create_chain_reuses_compiled_prompt():
+    template = "Prompt: {topic}"
+    first = create_chain(MagicMock(), template)
+    second = create_chain(MagicMock(), template)
+    
+    # The parsed prompt is shared, only the LLM binding differs
+    assert first.first is second.first
+
+def test_create_chain_binds_session_inputs():
+    template = "Prompt: {topic} for {brand_bio}"
+    chain = create_chain(MagicMock(), template, brand_bio="ACME")
+    
+    assert chain.first.input_variables == ["topic"]
+    assert chain.first.partial_variables == {"brand_bio": "ACME"}
+
 @patch("src.core.content_chains.get_llm")
 def test_create_blog_chain(mock_get_llm):
     mock_llm = MagicMock()
@@ -33,7 +63,8 @@ def test_create_twitter_chain(mock_get_llm):
     
     chain = create_twitter_adaptor_chain("Groq")
     
-    mock_get_llm.assert_called_once_with("Groq")
+    mock_get_llm.assert_called_once_with("Groq", max_tokens=TWITTER_MAX_TOKENS)
+    mock_llm.bind.assert_called_once_with(stop=TWITTER_STOP)
     assert isinstance(chain, RunnableSequence)
 
 @patch("src.core.content_chains.get_llm")
@@ -43,5 +74,77 @@ def test_create_image_prompt_chain(mock_get_llm):
     
     chain = create_image_prompt_chain("Ollama")
     
-    mock_get_llm.assert_called_once_with("Ollama")
+    mock_get_llm.assert_called_once_with("Ollama", max_tokens=IMAGE_PROMPT_MAX_TOKENS)
+    mock_llm.bind.assert_called_once_with(stop=IMAGE_PROMPT_STOP)
     assert isinstance(chain, RunnableSequence)
+
+def test_semantic_cached_chain_hit():
+    store = MagicMock()
+    cached_doc = Document(page_content="topic: AI", metadata={"response": "cached answer"})
+    store.similarity_search_with_relevance_scores.return_value = [(cached_doc, 0.97)]
+    chain = create_chain(MagicMock(), "Prompt: {topic}")
+    
+    with patch.object(type(chain), "invoke") as mock_invoke:
+        result = SemanticCachedChain(chain, store).invoke({"topic": "AI"})
+    
+    assert result == "cached answer"
+    mock_invoke.assert_not_called()
+
+def test_semantic_cached_chain_miss():
+    store = MagicMock()
+    store.similarity_search_with_relevance_scores.return_value = []
+    chain = create_chain(MagicMock(), "Prompt: {topic}")
+    
+    with patch.object(type(chain), "invoke", return_value="fresh answer"):
+        cached_chain = SemanticCachedChain(chain, store)
+        result = cached_chain.invoke({"topic": "AI"})
+    
+    assert result == "fresh answer"
+    store.add_texts.assert_called_once_with(
+        ["topic: AI"], metadatas=[{"namespace": cached_chain.namespace, "response": "fresh answer"}], ids=None
+    )
+
+def test_semantic_cached_chain_reads_exact_entries_by_key():
+    store = MagicMock()
+    store.get.return_value = {"metadatas": []}
+    chain = create_chain(MagicMock(), "Adapt: {blog_content}")
+    cached_chain = SemanticCachedChain(chain, store)
+    
+    with patch.object(type(chain), "ainvoke", AsyncMock(return_value="thread")):
+        result = asyncio.run(cached_chain.ainvoke({"blog_content": "blog"}))
+    
+    assert result == "thread"
+    store.similarity_search_with_relevance_scores.assert_not_called()
+    namespace = store.add_texts.call_args.kwargs["ids"][0]
+    store.get.assert_called_once_with(ids=[namespace], include=["metadatas"])
+    
+    store.get.return_value = {"metadatas": [{"namespace": namespace, "response": "thread"}]}
+    with patch.object(type(chain), "ainvoke") as mock_ainvoke:
+        assert asyncio.run(cached_chain.ainvoke({"blog_content": "blog"})) == "thread"
+    mock_ainvoke.assert_not_called()
+
+def test_semantic_cached_chain_pins_long_inputs_exactly():
+    store = MagicMock()
+    store.similarity_search_with_relevance_scores.return_value = []
+    chain = create_chain(MagicMock(), "Papers: {documents}\nTopic: {topic}")
+    cached_chain = SemanticCachedChain(chain, store)
+    
+    with patch.object(type(chain), "invoke", return_value="article"):
+        cached_chain.invoke({"topic": "Black holes", "documents": "paper text " * 200})
+        cached_chain.invoke({"topic": "Black holes", "documents": "other paper " * 200})
+    
+    first, second = store.add_texts.call_args_list
+    assert first.args[0] == second.args[0] == ["topic: Black holes"]
+    namespaces = {call.kwargs["metadatas"][0]["namespace"] for call in (first, second)}
+    assert len(namespaces) == 2 and cached_chain.namespace not in namespaces
+
+def test_ainvoke_all():
+    twitter = MagicMock(ainvoke=AsyncMock(return_value="thread"))
+    linkedin = MagicMock(ainvoke=AsyncMock(return_value="post"))
+    inputs = {"blog_content": "blog"}
+    
+    results = asyncio.run(ainvoke_all({"twitter": twitter, "linkedin": linkedin}, inputs))
+    
+    assert results == {"twitter": "thread", "linkedin": "post"}
+    twitter.ainvoke.assert_awaited_once_with(inputs)
+    linkedin.ainvoke.assert_awaited_once_with(inputs)
@@ -1,20 +1,70 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+import time
 import pytest
-from unittest.mock import patch, MagicMock, mock_open
+import requests
+from unittest.mock import patch, MagicMock
 from PIL import Image
+from huggingface_hub.errors import BadRequestError, HfHubHTTPError, InferenceTimeoutError
 from src.models.image_generator import (
     translate_to_english_keywords,
     extract_keywords,
     create_placeholder_image,
     generate_image_from_huggingface,
+    generate_image_bytes_from_huggingface,
     generate_image_from_replicate,
     search_image_from_unsplash,
-    search_image_from_pexels
+    search_image_from_pexels,
+    to_webp_bytes,
+    CircuitBreaker,
+    _get_hf_client,
+    _get_replicate_client,
+    _hf_breaker,
+    _unsplash_breaker,
+    _store_cached_image,
+    _image_cache_key,
+    _save_generated_image,
+    _http_session,
+    _bulkhead
 )
 
-def test_translate_to_english_keywords():
-    assert translate_to_english_keywords("agujeros negros") == "black hole space galaxy"
-    assert translate_to_english_keywords("inteligencia artificial") == "artificial intelligence technology"
-    assert translate_to_english_keywords("universo") == "universo" # Fallback cleaned
+# Stand-in for a generated image; tests never draw on it, so one tiny instance is shared
+_GENERATED_IMG = Image.new('RGB', (8, 8))
+
+@pytest.fixture(autouse=True)
+def clear_clients():
+    _get_hf_client.cache_clear()
+    _get_replicate_client.cache_clear()
+    _hf_breaker.reset()
+    yield
+    _get_hf_client.cache_clear()
+    _get_replicate_client.cache_clear()
+    _hf_breaker.reset()
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    
+    with patch("src.models.image_generator.time.monotonic", return_value=0):
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+    
+    with patch("src.models.image_generator.time.monotonic", return_value=61):
+        assert breaker.allow()          # Trial call after the timeout
+        assert not breaker.allow()      # Others wait for its outcome
+        breaker.record_success()
+        assert breaker.allow()
+
+@pytest.mark.parametrize("topic, expected", [
+    ("agujeros negros", "black hole space galaxy"),
+    ("inteligencia artificial", "artificial intelligence technology"),
+    ("universo", "universo"),  # Fallback cleaned
+])
+def test_translate_to_english_keywords(topic, expected):
+    assert translate_to_english_keywords(topic) == expected
 
 def test_extract_keywords():
     prompt = "A photorealistic image of a modern drone hovering above a futuristic city at sunset, 8k resolution"
@@ -27,11 +77,65 @@ def test_create_placeholder_image():
     img = create_placeholder_image("test")
     assert isinstance(img, Image.Image)
     assert img.size == (640, 480)
+    assert create_placeholder_image("other") is img
+
+def test_bulkhead_limits_concurrent_calls():
+    running, peak = 0, 0
+    lock = threading.Lock()
+    
+    @_bulkhead(threading.BoundedSemaphore(2), "test")
+    def call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+    
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert peak == 2
+
+@patch("src.models.image_generator.BULKHEAD_WAIT", 0.01)
+def test_bulkhead_gives_up_when_saturated():
+    slots = threading.BoundedSemaphore(1)
+    call = _bulkhead(slots, "test")(lambda: "result")
+    
+    slots.acquire()
+    assert call() is None
+    slots.release()
+    assert call() == "result"
+
+@patch("src.models.image_generator.BULKHEAD_WAIT", 0.01)
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_falls_back_when_saturated(mock_client):
+    with patch("src.models.image_generator._hf_slots", threading.BoundedSemaphore(1)) as slots:
+        slots.acquire()
+        result = generate_image_from_huggingface("test prompt")
+    
+    assert result.size == (640, 480)
+    mock_client.return_value.text_to_image.assert_not_called()
+
+def test_http_session_only_retries_statuses_and_connects():
+    retry = _http_session.get_adapter("https://api.pexels.com").max_retries
+    
+    assert (retry.connect, retry.read, retry.other) == (1, 0, 0)
+    assert 503 in retry.status_forcelist
+
+def test_to_webp_bytes():
+    data = to_webp_bytes(create_placeholder_image("test"))
+    
+    assert data[:4] == b"RIFF" and data[8:12] == b"WEBP"
 
 @patch("src.models.image_generator.InferenceClient")
 def test_generate_image_from_huggingface_success(mock_client):
     mock_instance = mock_client.return_value
-    mock_img = Image.new('RGB', (1024, 1024))
+    mock_img = _GENERATED_IMG
     mock_instance.text_to_image.return_value = mock_img
     
     result = generate_image_from_huggingface("test prompt")
@@ -49,55 +153,252 @@ def test_generate_image_from_huggingface_fallback(mock_client):
     assert isinstance(result, Image.Image) # Should return placeholder
     assert result.size == (640, 480)
 
-@patch("src.models.image_generator.replicate.run")
-@patch("src.models.image_generator.requests.get")
-@patch("builtins.open", new_callable=mock_open)
-def test_generate_image_from_replicate_success(mock_file, mock_get, mock_replicate):
-    mock_replicate.return_value = ["http://fakeurl.com/image.webp"]
+def _hf_http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return HfHubHTTPError(f"{status_code} error", response=response)
+
+@patch("src.models.image_generator.time.sleep")
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_backs_off_while_loading(mock_client, mock_sleep):
+    mock_img = _GENERATED_IMG
+    mock_client.return_value.text_to_image.side_effect = [
+        _hf_http_error(503),
+        _hf_http_error(503),
+        mock_img,
+    ]
+    
+    result = generate_image_from_huggingface("test prompt")
+    
+    assert result == mock_img
+    first_wait, second_wait = (c.args[0] for c in mock_sleep.call_args_list)
+    assert 2 <= first_wait < 3
+    assert 4 <= second_wait < 5
+
+@patch("src.models.image_generator.time.sleep")
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_does_not_retry_rate_limit(mock_client, mock_sleep):
+    mock_client.return_value.text_to_image.side_effect = _hf_http_error(429)
+    
+    result = generate_image_from_huggingface("test prompt")
+    
+    assert result.size == (640, 480)
+    mock_client.return_value.text_to_image.assert_called_once()
+    mock_sleep.assert_not_called()
+
+@patch("src.models.image_generator.time.sleep")
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_does_not_retry_timeouts(mock_client, mock_sleep):
+    mock_client.return_value.text_to_image.side_effect = InferenceTimeoutError("timed out")
+    
+    result = generate_image_from_huggingface("test prompt")
+    
+    assert result.size == (640, 480)
+    mock_client.return_value.text_to_image.assert_called_once()
+    mock_sleep.assert_not_called()
+
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_bad_prompts_do_not_open_circuit(mock_client):
+    mock_client.return_value.text_to_image.side_effect = BadRequestError("invalid prompt")
+    
+    for _ in range(_hf_breaker.fail_max):
+        result = generate_image_from_huggingface("test prompt")
+        assert result.size == (640, 480)
+    
+    assert _hf_breaker.allow()
+    assert mock_client.return_value.text_to_image.call_count == _hf_breaker.fail_max
+
+@patch("src.models.image_generator.time.sleep")
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_retries_connection_errors_quickly(mock_client, mock_sleep):
+    mock_img = _GENERATED_IMG
+    mock_client.return_value.text_to_image.side_effect = [
+        requests.exceptions.ConnectionError("connection reset"),
+        mock_img,
+    ]
+    
+    result = generate_image_from_huggingface("test prompt")
+    
+    assert result == mock_img
+    (wait,), _ = mock_sleep.call_args
+    assert 0.1 <= wait <= 0.5
+
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_skips_when_circuit_open(mock_client):
+    for _ in range(_hf_breaker.fail_max):
+        _hf_breaker.record_failure()
+    
+    result = generate_image_from_huggingface("test prompt")
+    
+    assert result.size == (640, 480)
+    mock_client.return_value.text_to_image.assert_not_called()
+
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_uses_image_cache(mock_client, tmp_path):
+    mock_client.return_value.text_to_image.return_value = Image.new('RGB', (64, 64), color=(255, 0, 0))
+    
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", True), \
+         patch("src.models.image_generator.IMAGE_CACHE_DIR", str(tmp_path)):
+        generate_image_from_huggingface("test prompt")
+        cached = generate_image_from_huggingface("test prompt")
+    
+    mock_client.return_value.text_to_image.assert_called_once()
+    assert cached.size == (64, 64)
+
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_bytes_from_huggingface_serves_cache_without_decoding(mock_client, tmp_path):
+    mock_client.return_value.text_to_image.return_value = Image.new('RGB', (64, 64))
+    
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", True), \
+         patch("src.models.image_generator.IMAGE_CACHE_DIR", str(tmp_path)):
+        first = generate_image_bytes_from_huggingface("test prompt")
+        with patch("src.models.image_generator.Image.open") as mock_open_img:
+            second = generate_image_bytes_from_huggingface("test prompt")
+    
+    assert first[8:12] == b"WEBP"
+    assert second == first
+    mock_open_img.assert_not_called()
+    mock_client.return_value.text_to_image.assert_called_once()
+
+@patch("src.models.image_generator.to_webp_bytes")
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_skips_encoding_without_cache(mock_client, mock_to_webp):
+    mock_client.return_value.text_to_image.return_value = _GENERATED_IMG
+    
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", False):
+        assert generate_image_from_huggingface("test prompt") is _GENERATED_IMG
+        generate_image_bytes_from_huggingface("other prompt")
+    
+    # Only the bytes variant encodes, because the WebP bytes are its result
+    mock_to_webp.assert_called_once()
+
+@patch("src.models.image_generator.HF_MODEL", "model")
+def test_image_cache_hit_survives_timestamp_errors(tmp_path):
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", True), \
+         patch("src.models.image_generator.IMAGE_CACHE_DIR", str(tmp_path)):
+        _store_cached_image(_image_cache_key("huggingface", "model", "test prompt"), b"cached")
+        with patch("src.models.image_generator.os.utime", side_effect=PermissionError("read-only")):
+            assert generate_image_bytes_from_huggingface("test prompt") == b"cached"
+
+@patch("src.models.image_generator._save_generated_image")
+@patch("src.models.image_generator.replicate")
+def test_generate_image_from_replicate_serves_cache_without_copying(mock_replicate, mock_save, tmp_path):
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", True), \
+         patch("src.models.image_generator.IMAGE_CACHE_DIR", str(tmp_path)), \
+         patch("src.models.image_generator.REPLICATE_MODEL", "model"):
+        key = _image_cache_key("replicate", "model", "test prompt")
+        _store_cached_image(key, b"cached")
+        path = generate_image_from_replicate("test prompt")
+    
+    assert path == str(tmp_path / f"{key}.webp")
+    mock_save.assert_not_called()
+    mock_replicate.Client.return_value.run.assert_not_called()
+
+def test_image_cache_key_ignores_case_and_whitespace():
+    key = _image_cache_key("huggingface", "model", "A cat  on a\nmat ")
+    
+    assert key == _image_cache_key("huggingface", "model", "a cat on a mat")
+    assert key != _image_cache_key("huggingface", "model", "a mat on a cat")
+    assert key != _image_cache_key("replicate", "model", "a cat on a mat")
+
+def test_image_cache_evicts_least_recently_used(tmp_path):
+    with patch("src.models.image_generator.IMAGE_CACHE_ENABLED", True), \
+         patch("src.models.image_generator.IMAGE_CACHE_DIR", str(tmp_path)), \
+         patch("src.models.image_generator.IMAGE_CACHE_SIZE_MB", 1):
+        _store_cached_image("old", b"x" * 600_000)
+        os.utime(tmp_path / "old.webp", (0, 0))
+        _store_cached_image("new", b"x" * 600_000)
+    
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.webp"]
+
+@patch("src.models.image_generator.InferenceClient")
+def test_generate_image_from_huggingface_reuses_client(mock_client):
+    mock_client.return_value.text_to_image.return_value = _GENERATED_IMG
+    
+    generate_image_from_huggingface("first prompt")
+    generate_image_from_huggingface("second prompt")
+    
+    mock_client.assert_called_once()
+
+@patch("src.models.image_generator.replicate.Client")
+@patch("src.models.image_generator._http_session.get")
+def test_generate_image_from_replicate_success(mock_get, mock_replicate, tmp_path):
+    mock_replicate.return_value.run.return_value = ["http://fakeurl.com/image.webp"]
     mock_response = MagicMock()
     mock_response.status_code = 200
-    mock_response.content = b"fake image content"
-    mock_get.return_value = mock_response
+    mock_response.iter_content.return_value = [b"fake image ", b"content"]
+    mock_get.return_value.__enter__.return_value = mock_response
     
-    result = generate_image_from_replicate("test prompt")
+    with patch("src.models.image_generator.GENERATED_IMAGES_DIR", str(tmp_path)):
+        result = generate_image_from_replicate("test prompt")
     
-    assert result == "generated_content.webp"
-    mock_file().write.assert_called_once_with(b"fake image content")
+    digest = hashlib.sha256(b"fake image content").hexdigest()[:16]
+    assert result == str(tmp_path / f"{digest}.webp")
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert Path(result).read_bytes() == b"fake image content"
+    assert [p.name for p in tmp_path.iterdir()] == [f"{digest}.webp"]
 
-@patch("src.models.image_generator.requests.get")
-@patch("src.models.image_generator.UNSPLASH_ACCESS_KEY", "fake_key")
-def test_search_image_from_unsplash_success(mock_get):
-    # Mock API call
-    mock_api_resp = MagicMock()
-    mock_api_resp.status_code = 200
-    mock_api_resp.json.return_value = {"urls": {"regular": "http://unsplash.com/img.jpg"}, "user": {"name": "Photographer"}}
+def test_save_generated_image_removes_partial_file_on_failure(tmp_path):
+    def broken_download():
+        yield b"partial"
+        raise requests.exceptions.ChunkedEncodingError("connection lost")
+    
+    with patch("src.models.image_generator.GENERATED_IMAGES_DIR", str(tmp_path)), \
+         pytest.raises(requests.exceptions.ChunkedEncodingError):
+        _save_generated_image(broken_download())
     
-    # Mock Image download
-    mock_img_resp = MagicMock()
-    mock_img_resp.status_code = 200
-    mock_img_resp.content = b"fake image content"
+    assert list(tmp_path.iterdir()) == []
+
+def test_save_generated_image_evicts_oldest_images(tmp_path):
+    (tmp_path / "old.webp").write_bytes(b"x" * 600_000)
+    os.utime(tmp_path / "old.webp", (0, 0))
+    
+    with patch("src.models.image_generator.GENERATED_IMAGES_DIR", str(tmp_path)), \
+         patch("src.models.image_generator.GENERATED_IMAGES_SIZE_MB", 1):
+        path = _save_generated_image([b"y" * 600_000])
     
-    mock_get.side_effect = [mock_api_resp, mock_img_resp]
+    assert [p.name for p in tmp_path.iterdir()] == [Path(path).name]
+
+def _stock_photo_responses(payload):
+    # A stock-photo search is an API call followed by the image download
+    api_resp = MagicMock(status_code=200)
+    api_resp.json.return_value = payload
+    img_resp = MagicMock(status_code=200, content=b"fake image content")
+    return [api_resp, img_resp]
+
+@patch("src.models.image_generator._http_session.get")
+@patch("src.models.image_generator.UNSPLASH_ACCESS_KEY", "fake_key")
+def test_search_image_from_unsplash_success(mock_get):
+    mock_get.side_effect = _stock_photo_responses(
+        {"urls": {"regular": "http://unsplash.com/img.jpg"}, "user": {"name": "Photographer"}}
+    )
     
     with patch("src.models.image_generator.Image.open") as mock_open_img:
         search_image_from_unsplash("space")
         mock_open_img.assert_called_once()
 
-@patch("src.models.image_generator.requests.get")
+@patch("src.models.image_generator._http_session.get")
 @patch("src.models.image_generator.PEXELS_API_KEY", "fake_key")
 def test_search_image_from_pexels_success(mock_get):
-    # Mock API call
-    mock_api_resp = MagicMock()
-    mock_api_resp.status_code = 200
-    mock_api_resp.json.return_value = {"photos": [{"src": {"large2x": "http://pexels.com/img.jpg"}, "photographer": "Artist"}]}
-    
-    # Mock Image download
-    mock_img_resp = MagicMock()
-    mock_img_resp.status_code = 200
-    mock_img_resp.content = b"fake image content"
-    
-    mock_get.side_effect = [mock_api_resp, mock_img_resp]
+    mock_get.side_effect = _stock_photo_responses(
+        {"photos": [{"src": {"large2x": "http://pexels.com/img.jpg"}, "photographer": "Artist"}]}
+    )
     
     with patch("src.models.image_generator.Image.open") as mock_open_img:
         search_image_from_pexels("science")
         mock_open_img.assert_called_once()
+
+@patch("src.models.image_generator._http_session.get")
+@patch("src.models.image_generator.UNSPLASH_ACCESS_KEY", "fake_key")
+def test_search_image_from_unsplash_closes_breaker_on_client_error(mock_get):
+    mock_get.return_value = MagicMock(status_code=404)
+    with patch("src.models.image_generator.time.monotonic", return_value=0):
+        for _ in range(_unsplash_breaker.fail_max):
+            _unsplash_breaker.record_failure()
+    
+    try:
+        with patch("src.models.image_generator.time.monotonic", return_value=61):
+            assert search_image_from_unsplash("space") is None   # Half-open trial call
+            assert _unsplash_breaker.allow()
+    finally:
+        _unsplash_breaker.reset()
@@ -1,8 +1,14 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from src.models.llm_factory import get_llm, get_llm_gemini, get_llm_groq, get_llm_ollama
+from src.models.llm_factory import get_llm, get_llm_gemini, get_llm_groq, get_llm_ollama, warm_up_llms
 
-@patch("src.models.llm_factory.ChatGoogleGenerativeAI")
+@pytest.fixture(autouse=True)
+def clear_llm_cache():
+    get_llm.cache_clear()
+    yield
+    get_llm.cache_clear()
+
+@patch("langchain_google_genai.ChatGoogleGenerativeAI")
 @patch("src.models.llm_factory.GEMINI_API_KEY", "fake_key")
 @patch("src.models.llm_factory.GEMINI_MODEL", "gemini-pro")
 def test_get_llm_gemini_success(mock_gemini):
@@ -10,12 +16,15 @@ def test_get_llm_gemini_success(mock_gemini):
     mock_gemini.assert_called_once()
     assert llm is not None
 
-@patch("src.models.llm_factory.GEMINI_API_KEY", None)
-def test_get_llm_gemini_missing_key():
-    with pytest.raises(ValueError, match="Gemini API Key is not set"):
-        get_llm_gemini()
+@pytest.mark.parametrize("key, factory, message", [
+    ("GEMINI_API_KEY", get_llm_gemini, "Gemini API Key is not set"),
+    ("GROQ_API_KEY", get_llm_groq, "Groq API Key is not set"),
+])
+def test_get_llm_missing_key(key, factory, message):
+    with patch(f"src.models.llm_factory.{key}", None), pytest.raises(ValueError, match=message):
+        factory()
 
-@patch("src.models.llm_factory.ChatGroq")
+@patch("langchain_groq.ChatGroq")
 @patch("src.models.llm_factory.GROQ_API_KEY", "fake_key")
 @patch("src.models.llm_factory.GROQ_MODEL", "llama3-8b")
 def test_get_llm_groq_success(mock_groq):
@@ -23,32 +32,52 @@ def test_get_llm_groq_success(mock_groq):
     mock_groq.assert_called_once()
     assert llm is not None
 
-@patch("src.models.llm_factory.GROQ_API_KEY", None)
-def test_get_llm_groq_missing_key():
-    with pytest.raises(ValueError, match="Groq API Key is not set"):
-        get_llm_groq()
+@patch("langchain_groq.ChatGroq")
+@patch("src.models.llm_factory.GROQ_API_KEY", "fake_key")
+def test_get_llm_groq_bounds_retries(mock_groq):
+    get_llm_groq()
+    kwargs = mock_groq.call_args.kwargs
+    assert (kwargs["max_retries"] + 1) * kwargs["timeout"] <= 60
 
-@patch("src.models.llm_factory.OllamaLLM")
+@patch("langchain_ollama.OllamaLLM")
 def test_get_llm_ollama_success(mock_ollama):
     llm = get_llm_ollama("mistral")
-    mock_ollama.assert_called_once_with(model="mistral", temperature=0.3)
+    mock_ollama.assert_called_once_with(model="mistral", temperature=0.3, num_predict=None)
     assert llm is not None
 
 def test_get_llm_invalid_choice():
     with pytest.raises(ValueError, match="LLM option not recognized"):
         get_llm("InvalidProvider")
 
-@patch("src.models.llm_factory.get_llm_gemini")
-def test_get_llm_factory_gemini(mock_get_gemini):
-    get_llm("Gemini")
-    mock_get_gemini.assert_called_once()
+@pytest.mark.parametrize("provider, factory", [
+    ("Gemini", "get_llm_gemini"),
+    ("Groq", "get_llm_groq"),
+    ("Ollama", "get_llm_ollama"),
+])
+def test_get_llm_factory_dispatch(provider, factory):
+    with patch(f"src.models.llm_factory.{factory}") as mock_factory:
+        assert get_llm(provider) is mock_factory.return_value
+    mock_factory.assert_called_once_with()
+
+@patch("src.models.llm_factory.get_llm_groq", side_effect=ValueError("Groq API Key is not set"))
+def test_get_llm_factory_wraps_init_errors(mock_get_groq):
+    with pytest.raises(RuntimeError, match="Error initialing Groq"):
+        get_llm("Groq")
+
+@patch("src.models.llm_factory.get_llm_groq")
+def test_get_llm_factory_forwards_max_tokens(mock_get_groq):
+    get_llm("Groq", max_tokens=100)
+    mock_get_groq.assert_called_once_with(max_tokens=100)
+
+@patch("src.models.llm_factory.get_llm_groq")
+def test_get_llm_factory_reuses_instance(mock_get_groq):
+    assert get_llm("Groq") is get_llm("Groq")
+    mock_get_groq.assert_called_once_with()
 
+@patch("src.models.llm_factory.get_llm_gemini", side_effect=ValueError("Gemini API Key is not set"))
 @patch("src.models.llm_factory.get_llm_groq")
-def test_get_llm_factory_groq(mock_get_groq):
-    get_llm("Groq")
-    mock_get_groq.assert_called_once()
-
-@patch("src.models.llm_factory.get_llm_ollama")
-def test_get_llm_factory_ollama(mock_get_ollama):
-    get_llm("Ollama")
-    mock_get_ollama.assert_called_once()
+def test_warm_up_llms_skips_unconfigured_providers(mock_get_groq, mock_get_gemini):
+    warm_up_llms(("Gemini", "Groq"))
+    
+    assert get_llm("Groq") is mock_get_groq.return_value
+    mock_get_groq.assert_called_once_with()
@@ -0,0 +1,36 @@
+from config.prompts import (
+    CHARS_PER_TOKEN,
+    PROMPT_STATIC_TOKENS,
+    estimate_tokens,
+    remaining_budget,
+    truncate_to_budget
+)
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * CHARS_PER_TOKEN) == 1
+    assert estimate_tokens("a" * (CHARS_PER_TOKEN + 1)) == 2
+
+def test_remaining_budget_subtracts_static_prompt_and_reserve():
+    static = PROMPT_STATIC_TOKENS["science"]
+    
+    assert static > 0
+    assert remaining_budget("science", 8192, reserved=500) == 8192 - static - 500
+    assert remaining_budget("science", static) == 0
+    assert remaining_budget("science", 10) == 0
+
+def test_truncate_to_budget_keeps_text_that_fits():
+    text = "short context"
+    assert truncate_to_budget(text, 100) is text
+
+def test_truncate_to_budget_drops_whole_chunks():
+    chunks = ["x" * 40, "y" * 40, "z" * 40]
+    text = "\n\n".join(chunks)
+    
+    result = truncate_to_budget(text, 25)
+    
+    assert result == "\n\n".join(chunks[:2])
+    assert estimate_tokens(result) <= 25
+
+def test_truncate_to_budget_cuts_a_single_long_chunk():
+    assert truncate_to_budget("x" * 100, 5) == "x" * 5 * CHARS_PER_TOKEN
@@ -1,13 +1,51 @@
+import asyncio
+import numpy as np
 import pytest
 import os
-from unittest.mock import patch, MagicMock
-from src.core.rag_engine import ScienceRAG
+import threading
+from unittest.mock import patch, MagicMock, AsyncMock
+from langchain_core.documents import Document
+from src.core.rag_engine import ScienceRAG, INGEST_BATCH_SIZE, _batched, _get_embedder, _get_document_embedder
 
 @pytest.fixture
 def mock_rag():
+    _get_embedder.cache_clear()
+    _get_document_embedder.cache_clear()
     with patch("src.core.rag_engine.HuggingFaceEmbeddings") as mock_embeddings:
+        mock_embeddings.return_value.embed_query.return_value = [1.0, 0.0]
         rag = ScienceRAG(topic="Test Topic")
         yield rag, mock_embeddings
+    _get_embedder.cache_clear()
+    _get_document_embedder.cache_clear()
+
+def test_embedder_is_shared(mock_rag):
+    rag, mock_embeddings = mock_rag
+    other = ScienceRAG()
+    
+    assert other.embeddings is rag.embeddings
+    mock_embeddings.assert_called_once()
+
+def test_document_embeddings_are_cached(mock_rag, tmp_path):
+    _, mock_embeddings = mock_rag
+    mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    
+    with patch("src.core.rag_engine.EMBEDDING_CACHE_DIR", str(tmp_path)):
+        embedder = _get_document_embedder()
+        embedder.embed_documents(["chunk one", "chunk two"])
+        vectors = embedder.embed_documents(["chunk one", "chunk three"])
+    
+    assert vectors == [[1.0, 0.0], [1.0, 0.0]]
+    assert mock_embeddings.return_value.embed_documents.call_args_list[-1].args == (["chunk three"],)
+
+def test_embedder_uses_gpu_in_half_precision():
+    torch = pytest.importorskip("torch")
+    from src.core.rag_engine import _embedder_model_kwargs
+    
+    with patch.object(torch.cuda, "is_available", return_value=True), \
+         patch.object(torch.cuda, "is_bf16_supported", return_value=False):
+        kwargs = _embedder_model_kwargs()
+    
+    assert kwargs == {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
 
 @patch("src.core.rag_engine.ArxivLoader")
 @patch("src.core.rag_engine.Chroma")
@@ -15,15 +53,98 @@ def test_ingest_papers_success(mock_chroma, mock_arxiv, mock_rag):
     rag, _ = mock_rag
     
     # Mock arXiv returns
-    mock_doc = MagicMock()
-    mock_doc.page_content = "Test content"
-    mock_doc.metadata = {"Title": "Test Paper"}
+    mock_doc = Document(page_content="Test content", metadata={"Title": "Test Paper"})
     mock_arxiv.return_value.load.return_value = [mock_doc]
     
     result = rag.ingest_papers("AI", max_results=1)
     
     assert "1 paper(s) sobre 'AI' han sido indexados" in result
-    mock_chroma.from_documents.assert_called_once()
+    mock_chroma.return_value.add_documents.assert_called_once()
+
+@patch("src.core.rag_engine.ArxivLoader")
+@patch("src.core.rag_engine.Chroma")
+def test_aingest_papers_success(mock_chroma, mock_arxiv, mock_rag):
+    rag, _ = mock_rag
+    
+    mock_doc = Document(page_content="Test content", metadata={"Title": "Test Paper"})
+    mock_arxiv.return_value.aload = AsyncMock(return_value=[mock_doc])
+    mock_chroma.return_value.aadd_documents = AsyncMock()
+    
+    result = asyncio.run(rag.aingest_papers("AI", max_results=1))
+    
+    assert "1 paper(s) sobre 'AI' han sido indexados" in result
+    mock_chroma.return_value.aadd_documents.assert_awaited_once()
+
+@patch("src.core.rag_engine.Chroma")
+def test_ingest_papers_writes_in_batches(mock_chroma, mock_rag):
+    rag, _ = mock_rag
+    splits = [Document(page_content="chunk") for _ in range(INGEST_BATCH_SIZE * 2 + 1)]
+    
+    with patch("src.core.rag_engine.ArxivLoader") as mock_arxiv, \
+         patch.object(rag, "_split_documents", return_value=splits):
+        mock_arxiv.return_value.load.return_value = [Document(page_content="Test content")]
+        rag.ingest_papers("AI", max_results=1)
+    
+    add_documents = mock_chroma.return_value.add_documents
+    assert [len(c.args[0]) for c in add_documents.call_args_list] == [INGEST_BATCH_SIZE, INGEST_BATCH_SIZE, 1]
+
+@patch("src.core.rag_engine.ArxivLoader")
+@patch("src.core.rag_engine.Chroma")
+def test_ingest_papers_skips_indexed_papers(mock_chroma, mock_arxiv, mock_rag, tmp_path):
+    rag, _ = mock_rag
+    rag.persist_directory = str(tmp_path)
+    old = Document(page_content="old paper", metadata={"entry_id": "http://arxiv.org/abs/1"})
+    new = Document(page_content="new paper", metadata={"entry_id": "http://arxiv.org/abs/2"})
+    mock_arxiv.return_value.load.return_value = [old, new]
+    mock_chroma.return_value.get.return_value = {"metadatas": [{"entry_id": "http://arxiv.org/abs/1"}]}
+    
+    rag.ingest_papers("AI", max_results=2)
+    
+    mock_chroma.return_value.get.assert_called_once_with(
+        where={"entry_id": {"$in": ["http://arxiv.org/abs/1", "http://arxiv.org/abs/2"]}},
+        include=["metadatas"]
+    )
+    (stored,), _ = mock_chroma.return_value.add_documents.call_args
+    assert [doc.page_content for doc in stored] == ["new paper"]
+
+@patch("src.core.rag_engine.ArxivLoader")
+@patch("src.core.rag_engine.Chroma")
+def test_ingest_papers_all_already_indexed(mock_chroma, mock_arxiv, mock_rag, tmp_path):
+    rag, _ = mock_rag
+    rag.persist_directory = str(tmp_path)
+    doc = Document(page_content="old paper", metadata={"entry_id": "http://arxiv.org/abs/1"})
+    mock_arxiv.return_value.load.return_value = [doc]
+    mock_chroma.return_value.get.return_value = {"metadatas": [{"entry_id": "http://arxiv.org/abs/1"}]}
+    
+    result = rag.ingest_papers("AI", max_results=1)
+    
+    assert "ya estaban indexados" in result
+    mock_chroma.return_value.add_documents.assert_not_called()
+
+def test_batched_consumes_lazily():
+    produced = []
+    def chunks():
+        for i in range(5):
+            produced.append(i)
+            yield i
+    
+    batches = _batched(chunks(), size=2)
+    
+    assert next(batches) == [0, 1]
+    assert produced == [0, 1]
+    assert list(batches) == [[2, 3], [4]]
+
+def test_split_documents_drops_complex_metadata(mock_rag):
+    rag, _ = mock_rag
+    doc = Document(
+        page_content="word " * 300,
+        metadata={"Title": "Paper", "Authors": ["A", "B"], "links": [{"href": "x"}]}
+    )
+    
+    splits = list(rag._split_documents([doc]))
+    
+    assert len(splits) > 1
+    assert all(split.metadata == {"Title": "Paper"} for split in splits)
 
 @patch("src.core.rag_engine.ArxivLoader")
 def test_ingest_papers_no_results(mock_arxiv, mock_rag):
@@ -34,51 +155,181 @@ def test_ingest_papers_no_results(mock_arxiv, mock_rag):
     
     assert "No se han encontrado papers" in result
 
+def _mock_vector_search(vector_store, docs, distance=0.1):
+    search = vector_store.similarity_search_by_vector_with_relevance_scores
+    search.return_value = [(doc, distance) for doc in docs]
+    return search
+
 @patch("src.core.rag_engine.Chroma")
 def test_get_context_success(mock_chroma, mock_rag):
     rag, _ = mock_rag
+    mock_doc = Document(page_content="Context content")
     
-    # Mock retriever
-    mock_retriever = MagicMock()
-    mock_doc = MagicMock()
-    mock_doc.page_content = "Context content"
-    mock_retriever.invoke.return_value = [mock_doc]
+    # Set rag.vector_store to the mocked Chroma instance
+    rag.vector_store = mock_chroma.return_value
+    search = _mock_vector_search(rag.vector_store, [mock_doc])
     
-    # Mock vector store as retriever
-    mock_instance = mock_chroma.return_value
-    mock_instance.as_retriever.return_value = mock_retriever
+    context = rag.get_context("test query")
     
-    # Set rag.vector_store to mock_instance
-    rag.vector_store = mock_instance
+    assert context == "Context content"
+    # The query embedding is computed once and reused for the vector search
+    rag.embeddings.embed_query.assert_called_once_with("test query")
+    search.assert_called_once_with([1.0, 0.0], k=3)
+
+def test_get_context_drops_low_relevance_chunks(mock_rag):
+    rag, _ = mock_rag
+    rag.vector_store = MagicMock()
+    _mock_vector_search(rag.vector_store, [Document(page_content="Far away")], distance=1.2)
+    
+    assert rag.get_context("test query") == ""
+
+def test_get_context_returns_empty_when_embedding_fails(mock_rag):
+    rag, _ = mock_rag
+    rag.embeddings.embed_query.side_effect = RuntimeError("model unavailable")
+    
+    assert rag.get_context("test query") == ""
+
+def test_get_context_reuses_cached_topic(mock_rag):
+    rag, _ = mock_rag
+    mock_doc = Document(page_content="Context content")
+    rag.vector_store = MagicMock()
+    search = _mock_vector_search(rag.vector_store, [mock_doc])
+    
+    first = rag.get_context("Black Holes")
+    second = rag.get_context("  black   holes ")
+    
+    assert first == second == "Context content"
+    search.assert_called_once()
+
+def test_get_context_reuses_similar_query(mock_rag):
+    rag, _ = mock_rag
+    vectors = {"black holes": [1.0, 0.0], "what are black holes": [0.99, 0.05], "dark matter": [0.0, 1.0]}
+    rag.embeddings.embed_query.side_effect = vectors.get
+    rag.vector_store = MagicMock()
+    search = _mock_vector_search(rag.vector_store, [Document(page_content="Context content")])
+    
+    rag.get_context("Black Holes")
+    rag.get_context("What are black holes")
+    rag.get_context("Dark matter")
+    
+    assert search.call_count == 2
+
+def test_get_context_evicts_least_recently_used(mock_rag):
+    rag, _ = mock_rag
+    rag.embeddings.embed_query.side_effect = lambda key: [1.0, 0.0] if key == "a" else [0.0, 1.0]
+    rag.vector_store = MagicMock()
+    _mock_vector_search(rag.vector_store, [])
+    
+    with patch("src.core.rag_engine.QUERY_CACHE_SIZE", 1):
+        rag.get_context("a")
+        rag.get_context("b")
+    
+    assert list(rag._context_cache) == ["b"]
+    assert rag._query_keys == ["b"]
+    assert rag._query_vectors[0].tolist() == [0.0, 1.0]
+
+def test_get_context_eviction_keeps_vectors_aligned(mock_rag):
+    rag, _ = mock_rag
+    vectors = {"a": [1.0, 0.0], "b": [0.0, 1.0], "c": [0.6, 0.8]}
+    rag.embeddings.embed_query.side_effect = vectors.get
+    rag.vector_store = MagicMock()
+    _mock_vector_search(rag.vector_store, [])
+    
+    with patch("src.core.rag_engine.QUERY_CACHE_SIZE", 2):
+        rag.get_context("a")
+        rag.get_context("b")
+        rag.get_context("c")
+    
+    assert rag._query_keys == ["b", "c"]
+    assert rag._query_vectors.dtype == np.float32 and rag._query_vectors.flags.c_contiguous
+    assert np.allclose(rag._query_vectors, [[0.0, 1.0], [0.6, 0.8]])
+
+def test_remember_context_ignores_duplicate_keys(mock_rag):
+    rag, _ = mock_rag
+    vector = np.array([1.0, 0.0], dtype=np.float32)
+    
+    rag._remember_context("a", vector, "first", rag._cache_generation)
+    rag._remember_context("a", vector, "second", rag._cache_generation)
+    
+    assert rag._query_keys == ["a"]
+    assert rag._context_cache == {"a": "second"}
+
+def test_get_context_does_not_cache_results_of_an_older_corpus(mock_rag):
+    rag, _ = mock_rag
+    rag.vector_store = MagicMock()
+    
+    def search_during_ingest(*args, **kwargs):
+        # The corpus changes while this search is still running
+        rag._finish_ingest("AI", [])
+        return [(Document(page_content="Old content"), 0.1)]
+    
+    rag.vector_store.similarity_search_by_vector_with_relevance_scores.side_effect = search_during_ingest
+    
+    assert rag.get_context("test query") == "Old content"
+    assert rag._context_cache == {}
+
+def test_get_context_is_thread_safe(mock_rag):
+    rag, _ = mock_rag
+    vectors = {"a": [1.0, 0.0], "b": [0.0, 1.0], "c": [0.6, 0.8]}
+    rag.embeddings.embed_query.side_effect = vectors.get
+    rag.vector_store = MagicMock()
+    _mock_vector_search(rag.vector_store, [])
+    errors = []
+    
+    def worker():
+        try:
+            for i in range(300):
+                rag.get_context("abc"[i % 3])
+        except Exception as e:
+            errors.append(e)
+    
+    with patch("src.core.rag_engine.QUERY_CACHE_SIZE", 2):
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    assert errors == []
+    assert sorted(rag._query_keys) == sorted(rag._context_cache)
+    for row, key in enumerate(rag._query_keys):
+        assert np.allclose(rag._query_vectors[row], vectors[key])
+
+def test_get_context_orders_chunks_deterministically(mock_rag):
+    rag, _ = mock_rag
+    doc_b = Document(page_content="B content", metadata={"Title": "Paper B"})
+    doc_a = Document(page_content="A content", metadata={"Title": "Paper A"})
+    rag.vector_store = MagicMock()
+    _mock_vector_search(rag.vector_store, [doc_b, doc_a])
     
     context = rag.get_context("test query")
     
-    assert context == "Context content"
-    mock_retriever.invoke.assert_called_once_with("test query")
+    assert context == "A content\n\nB content"
 
-def test_list_indexed_papers_empty(mock_rag):
+def test_list_indexed_papers_empty(mock_rag, tmp_path):
     rag, _ = mock_rag
-    with patch("os.path.exists", return_value=False):
-        titles = rag.list_indexed_papers()
-        assert titles == []
+    rag.persist_directory = str(tmp_path / "missing")
+    
+    assert rag.list_indexed_papers() == []
 
-@patch("src.core.rag_engine.Chroma")
-def test_list_indexed_papers_with_data(mock_chroma, mock_rag):
+def test_list_indexed_papers_with_data(mock_rag, tmp_path):
     rag, _ = mock_rag
-    mock_instance = mock_chroma.return_value
-    mock_instance.get.return_value = {'metadatas': [{'Title': 'Paper 1'}, {'title': 'Paper 2'}]}
+    rag.persist_directory = str(tmp_path)
+    rag.vector_store = MagicMock()
+    rag.vector_store.get.return_value = {'metadatas': [{'Title': 'Paper 1'}, {'title': 'Paper 2'}]}
+    
+    titles = rag.list_indexed_papers()
     
-    with patch("os.path.exists", return_value=True):
-        titles = rag.list_indexed_papers()
-        assert set(titles) == {"Paper 1", "Paper 2"}
+    assert sorted(titles) == ["Paper 1", "Paper 2"]
+    rag.vector_store.get.assert_called_once_with(include=["metadatas"])
 
-@patch("shutil.rmtree")
-@patch("os.path.exists", return_value=True)
-def test_reset_database(mock_exists, mock_rmtree, mock_rag):
+def test_reset_database(mock_rag, tmp_path):
     rag, _ = mock_rag
+    rag.persist_directory = str(tmp_path / "chroma_db")
+    os.makedirs(rag.persist_directory)
     rag.vector_store = MagicMock()
     
     rag.reset_database()
     
-    mock_rmtree.assert_called_once_with(rag.persist_directory)
+    assert not os.path.exists(rag.persist_directory)
     assert rag.vector_store is None
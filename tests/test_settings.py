@@ -0,0 +1,39 @@
+import pytest
+from config.settings import Settings
+
+def test_from_env_keeps_defaults_for_unset_keys(monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE_THRESHOLD", raising=False)
+    
+    assert Settings.from_env().semantic_cache_threshold == 0.92
+
+@pytest.mark.parametrize("raw, expected", [
+    ("true", True), ("TRUE", True), ("1", True), ("yes", True),
+    ("false", False), ("0", False), ("no", False),
+])
+def test_from_env_parses_bools(monkeypatch, raw, expected):
+    monkeypatch.setenv("IMAGE_CACHE_ENABLED", raw)
+    
+    assert Settings.from_env().image_cache_enabled is expected
+
+def test_from_env_parses_numbers(monkeypatch):
+    monkeypatch.setenv("IMAGE_CACHE_SIZE_MB", "250")
+    monkeypatch.setenv("SEMANTIC_CACHE_THRESHOLD", "0.85")
+    
+    settings = Settings.from_env()
+    
+    assert settings.image_cache_size_mb == 250
+    assert settings.semantic_cache_threshold == 0.85
+
+@pytest.mark.parametrize("raw", ["", "   "])
+def test_from_env_treats_empty_values_as_unset(monkeypatch, raw):
+    monkeypatch.setenv("SEMANTIC_CACHE_THRESHOLD", raw)
+    monkeypatch.setenv("IMAGE_CACHE_SIZE_MB", raw)
+    monkeypatch.setenv("IMAGE_CACHE_ENABLED", raw)
+    monkeypatch.setenv("GROQ_API_KEY", raw)
+    
+    settings = Settings.from_env()
+    
+    assert settings.semantic_cache_threshold == 0.92
+    assert settings.image_cache_size_mb == 500
+    assert settings.image_cache_enabled is False
+    assert settings.groq_api_key is None